@@ -0,0 +1,104 @@
+# ==========================================
+#  ARRANQUE DEL SERVIDOR
+#  Fases medidas, carga del estado guardado y readiness
+# ==========================================
+#
+#  En Render (plan gratuito) el servicio se duerme y la primera visita paga
+#  un arranque en frío. Este módulo mide cada fase del arranque y decide qué
+#  trabajo se hace antes de aceptar requests (APPARKALA_ARRANQUE):
+#
+#    normal  -> el estado guardado se carga antes de aceptar requests.
+#    rapido  -> el servidor acepta requests apenas termina de importar; el
+#               estado se carga en un hilo aparte (/readyz responde 503 hasta
+#               que termina) y después se hacen las tareas diferidas, como
+#               generar el esquema OpenAPI de /docs.
+#
+#  /healthz responde siempre que el proceso esté vivo.
+
+import logging
+import threading
+import time
+
+# Se toma al importar el módulo: app.main lo importa antes que a FastAPI
+_INICIO = time.perf_counter()
+
+MODOS = ("normal", "rapido")
+
+logger = logging.getLogger(__name__)
+
+
+class Arranque:
+    """Fases del arranque y estado de readiness del servidor."""
+
+    def __init__(self, modo="normal"):
+        if modo not in MODOS:
+            raise ValueError(f"Modo de arranque '{modo}' no reconocido")
+        self.modo = modo
+        self.fases = {}   # fase -> segundos desde el inicio del arranque
+        self.error = None
+        self._listo = False
+        self._terminado = threading.Event()
+
+    def marcar(self, fase):
+        """Registra el momento en que terminó una fase."""
+        self.fases[fase] = time.perf_counter() - _INICIO
+
+    # -------------------------------
+    #  PREPARACIÓN DEL ESTADO
+    # -------------------------------
+    def _preparar(self, cargar_estado, diferidas):
+        try:
+            cargar_estado()
+        except Exception as error:
+            # Sin su estado el servidor no queda listo: mejor que atender vacío
+            logger.exception("Error cargando el estado guardado")
+            self.error = str(error)
+            self._terminado.set()
+            return
+        self.marcar("estado")
+        self._listo = True
+        self._terminado.set()
+
+        for fase, tarea in diferidas:
+            try:
+                tarea()
+            except Exception:
+                logger.exception("Error en la tarea diferida '%s'", fase)
+                continue
+            self.marcar(fase)
+
+    def iniciar(self, cargar_estado, diferidas=()):
+        """
+        Carga el estado con cargar_estado() y luego ejecuta las tareas diferidas
+        (pares (fase, función)). En modo normal la carga bloquea hasta terminar y
+        las tareas diferidas quedan para cuando se pidan; en modo rápido todo se
+        hace en un hilo aparte.
+        """
+        self.marcar("servidor")
+        if self.modo == "rapido":
+            threading.Thread(target=self._preparar, args=(cargar_estado, diferidas),
+                             name="arranque", daemon=True).start()
+            return
+        self._preparar(cargar_estado, ())
+        if self.error is not None:
+            raise RuntimeError(f"No se pudo cargar el estado guardado: {self.error}")
+
+    # -------------------------------
+    #  READINESS
+    # -------------------------------
+    def esta_listo(self):
+        return self._listo
+
+    def esperar(self, espera=None):
+        """Espera a que termine la carga del estado. Retorna True si quedó listo."""
+        self._terminado.wait(espera)
+        return self._listo
+
+    def resumen(self):
+        """Retorna el modo, si está listo y las fases en ms desde el inicio."""
+        return {
+            "modo": self.modo,
+            "listo": self._listo,
+            "error": self.error,
+            "fases_ms": {fase: round(segundos * 1000, 1) for fase, segundos in self.fases.items()}
+        }
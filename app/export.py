@@ -0,0 +1,118 @@
+# ==========================================
+#  EXPORTS EN STREAMING
+#  Generadores NDJSON/CSV sobre el estado de la cochera
+# ==========================================
+#
+#  Cada función toma una foto consistente del estado al ser llamada y
+#  retorna un generador que produce el contenido en bloques de texto.
+#
+#  La foto es barata y no bloquea a los escritores:
+#    - Las listas de casillas se copian (sólo referencias, en C y de una vez).
+#      Como registrar_pago reemplaza el vehículo en vez de modificarlo, las
+#      referencias copiadas no cambian mientras dura el export.
+#    - El historial sólo crece, así que basta con recordar su largo.
+
+import csv
+import io
+import json
+
+FORMATOS = ("ndjson", "csv")
+TIPOS_CONTENIDO = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+# Filas por bloque: suficientes para amortizar el envío de cada bloque sin
+# acumular demasiada memoria
+FILAS_POR_BLOQUE = 1000
+
+CAMPOS_VEHICULO = [
+    "tipo", "placa", "dueno", "dni", "telefono", "marca", "modelo",
+    "casilla_tipo", "casilla_numero", "mes_pagado", "anio_pagado",
+    "tarifa_mensual", "nombre_casilla",
+]
+CAMPOS_DEUDOR = ["tipo", "placa", "dueno", "casilla", "tarifa", "mes_pagado", "anio_pagado"]
+CAMPOS_HISTORIAL = [
+    "id", "tiempo", "evento", "tipo", "placa", "casilla", "mes", "anio", "reserva", "texto",
+]
+
+# json.dumps con argumentos no default arma un encoder nuevo en cada llamada
+_a_json = json.JSONEncoder(ensure_ascii=False).encode
+
+
+# -------------------------------
+#  SERIALIZACIÓN POR BLOQUES
+# -------------------------------
+def _bloques_ndjson(filas):
+    bloque = []
+    for fila in filas:
+        bloque.append(_a_json(fila))
+        if len(bloque) >= FILAS_POR_BLOQUE:
+            yield "\n".join(bloque) + "\n"
+            bloque = []
+    if bloque:
+        yield "\n".join(bloque) + "\n"
+
+
+def _bloques_csv(filas, campos):
+    buffer = io.StringIO()
+    escritor = csv.DictWriter(buffer, fieldnames=campos, lineterminator="\n")
+    escritor.writeheader()
+    pendientes = 0
+    for fila in filas:
+        escritor.writerow(fila)
+        pendientes += 1
+        if pendientes >= FILAS_POR_BLOQUE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pendientes = 0
+    # Siempre se envía al menos la cabecera
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _serializar(filas, formato, campos):
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato '{formato}' no reconocido")
+    if formato == "csv":
+        return _bloques_csv(filas, campos)
+    return _bloques_ndjson(filas)
+
+
+# -------------------------------
+#  EXPORTS
+# -------------------------------
+def exportar_vehiculos(cochera, formato="ndjson"):
+    """Exporta todos los vehículos registrados."""
+    casillas = cochera.casillas_carros + cochera.casillas_motos
+    filas = (veh.to_dict() for veh in casillas if veh is not None)
+    return _serializar(filas, formato, CAMPOS_VEHICULO)
+
+
+def exportar_deudores(cochera, mes_actual, anio_actual, formato="ndjson"):
+    """Exporta los vehículos que no están al día con el pago."""
+    casillas = cochera.casillas_carros + cochera.casillas_motos
+
+    def filas():
+        for veh in casillas:
+            if veh is not None and not veh.esta_al_dia(mes_actual, anio_actual):
+                yield {
+                    "tipo": veh.tipo,
+                    "placa": veh.placa,
+                    "dueno": veh.dueno,
+                    "casilla": f"{veh.casilla_tipo[0]}{veh.casilla_numero}",
+                    "tarifa": veh.tarifa_mensual,
+                    "mes_pagado": veh.mes_pagado,
+                    "anio_pagado": veh.anio_pagado
+                }
+
+    return _serializar(filas(), formato, CAMPOS_DEUDOR)
+
+
+def exportar_historial(cochera, formato="ndjson"):
+    """Exporta el historial de movimientos."""
+    historial = cochera.historial
+    total = len(historial)
+    filas = (historial.evento(i) for i in range(total))
+    return _serializar(filas, formato, CAMPOS_HISTORIAL)
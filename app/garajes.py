@@ -0,0 +1,287 @@
+# ==========================================
+#  REGISTRO DE GARAJES (MULTI-TENANT)
+#  Varias cocheras en un mismo proceso, cargadas bajo demanda
+# ==========================================
+#
+#  Cada garaje es una Cochera independiente (con sus propias capacidades y
+#  tarifas) persistida como snapshot binario en "<carpeta>/<id>.snapshot".
+#  Sólo los garajes usados recientemente se mantienen en memoria: cuando la
+#  memoria estimada supera el presupuesto se guardan y descargan los menos
+#  usados (LRU).
+#
+#  El lock del registro sólo protege sus diccionarios y contadores: leer o
+#  escribir un snapshot se hace sin tenerlo, así la carga de un garaje frío
+#  no demora a los garajes que ya están en memoria. Mientras un garaje se
+#  carga (o se guarda al expulsarlo) queda marcado en `_cargando` y quien lo
+#  pida espera a que termine esa única carga.
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from app.models import Cochera
+
+EXTENSION = ".snapshot"
+_ID_VALIDO = re.compile(r"[A-Za-z0-9_-]{1,64}")  # se usa con fullmatch
+
+# Máximo de casillas de cada tipo por garaje (cada casilla reserva su lugar en memoria)
+MAX_CAPACIDAD = 10_000
+
+# Costos aproximados en memoria (medidos con tracemalloc en CPython 3.11)
+BYTES_BASE = 1_000        # objeto Cochera y sus listas vacías
+BYTES_POR_CASILLA = 8     # una referencia en la lista de casillas
+BYTES_POR_VEHICULO = 450  # Vehiculo con sus atributos y textos
+BYTES_POR_EVENTO = 60     # evento en columnas más sus entradas en los índices
+BYTES_POR_RESERVA = 250   # Reserva más su lugar en la agenda y los diccionarios
+BYTES_POR_HUECO = 150     # nodo del índice de huecos de las reservas
+
+
+def estimar_memoria(cochera):
+    """Estimación barata de los bytes que ocupa una cochera en memoria."""
+    casillas = len(cochera.casillas_carros) + len(cochera.casillas_motos)
+    libres = cochera.casillas_carros.count(None) + cochera.casillas_motos.count(None)
+    return (BYTES_BASE
+            + casillas * BYTES_POR_CASILLA
+            + (casillas - libres) * BYTES_POR_VEHICULO
+            + len(cochera.historial) * BYTES_POR_EVENTO
+            + len(cochera.reservas) * BYTES_POR_RESERVA
+            + sum(map(len, cochera.indices_huecos.values())) * BYTES_POR_HUECO)
+
+
+class LimiteGarajes(Exception):
+    """Se alcanzó la cantidad máxima de garajes."""
+
+
+class _Entrada:
+    """Garaje cargado en memoria junto con su estado de uso."""
+
+    def __init__(self, cochera):
+        self.cochera = cochera
+        self.memoria = estimar_memoria(cochera)
+        self.en_uso = 0
+        # Todas las operaciones que modifican la cochera dejan un evento en el
+        # historial, así que su largo alcanza para saber si hay cambios sin
+        # guardar y si hace falta volver a estimar su memoria
+        self.eventos_guardados = len(cochera.historial)
+        self.eventos_medidos = len(cochera.historial)
+
+    def tiene_cambios(self):
+        return len(self.cochera.historial) != self.eventos_guardados
+
+
+class RegistroGarajes:
+    """Mantiene las cocheras de todos los garajes con carga perezosa y expulsión LRU."""
+
+    def __init__(self, carpeta, presupuesto_bytes, max_garajes=None):
+        self.carpeta = carpeta
+        self.presupuesto_bytes = presupuesto_bytes
+        self.max_garajes = max_garajes  # None = sin límite
+        self._cantidad = None           # garajes en disco, se cuenta una vez al crear
+        self._cargados = OrderedDict()  # garaje_id -> _Entrada (el primero es el menos usado)
+        self._cargando = {}             # garaje_id -> Event que se activa al terminar su E/S
+        self._memoria = 0
+        self._lock = threading.Lock()
+        self.cargas = 0
+        self.expulsiones = 0
+
+    # -------------------------------
+    #  FUNCIONES DE APOYO INTERNAS
+    # -------------------------------
+    def _ruta(self, garaje_id):
+        return os.path.join(self.carpeta, garaje_id + EXTENSION)
+
+    def _contar_garajes(self):
+        if self._cantidad is None:
+            try:
+                nombres = os.listdir(self.carpeta)
+            except FileNotFoundError:
+                nombres = []
+            self._cantidad = sum(nombre.endswith(EXTENSION) for nombre in nombres)
+        return self._cantidad
+
+    def _guardar(self, garaje_id, entrada):
+        """Escribe el snapshot del garaje. Se llama sin el lock del registro."""
+        os.makedirs(self.carpeta, exist_ok=True)
+        with entrada.cochera.lock:
+            eventos = len(entrada.cochera.historial)
+            entrada.cochera.to_snapshot(self._ruta(garaje_id))
+        entrada.eventos_guardados = eventos
+
+    def _agregar(self, garaje_id, cochera):
+        entrada = _Entrada(cochera)
+        self._cargados[garaje_id] = entrada
+        self._memoria += entrada.memoria
+        return entrada
+
+    def _elegir_expulsados(self):
+        """
+        Saca de memoria los garajes menos usados hasta entrar en el presupuesto.
+        Se llama con el lock tomado; retorna los que hay que guardar (con su
+        marca en `_cargando`) para hacerlo después sin el lock.
+        """
+        a_guardar = []
+        if self._memoria <= self.presupuesto_bytes:
+            return a_guardar
+        for garaje_id in list(self._cargados):
+            if self._memoria <= self.presupuesto_bytes:
+                break
+            entrada = self._cargados[garaje_id]
+            if entrada.en_uso:
+                continue  # una request lo está usando: se descarga más adelante
+            del self._cargados[garaje_id]
+            self._memoria -= entrada.memoria
+            self.expulsiones += 1
+            if entrada.tiene_cambios():
+                # Hasta que termine de guardarse nadie debe cargar el snapshot viejo
+                guardado = self._cargando[garaje_id] = threading.Event()
+                a_guardar.append((garaje_id, entrada, guardado))
+        return a_guardar
+
+    def _guardar_expulsados(self, a_guardar):
+        for garaje_id, entrada, guardado in a_guardar:
+            try:
+                self._guardar(garaje_id, entrada)
+            finally:
+                with self._lock:
+                    del self._cargando[garaje_id]
+                guardado.set()
+
+    def _tomar_entrada(self, garaje_id):
+        """
+        Retorna la entrada del garaje marcada en uso (cargándola si hace falta)
+        o None si el garaje no existe.
+        """
+        while True:
+            with self._lock:
+                entrada = self._cargados.get(garaje_id)
+                if entrada is not None:
+                    self._cargados.move_to_end(garaje_id)
+                    entrada.en_uso += 1
+                    return entrada
+                en_curso = self._cargando.get(garaje_id)
+                if en_curso is None:
+                    carga = self._cargando[garaje_id] = threading.Event()
+            if en_curso is not None:
+                # Otro hilo lo está cargando o guardando: se espera y se vuelve a mirar
+                en_curso.wait()
+                continue
+
+            try:
+                ruta = self._ruta(garaje_id)
+                cochera = Cochera.from_snapshot(ruta) if os.path.exists(ruta) else None
+            except BaseException:
+                with self._lock:
+                    del self._cargando[garaje_id]
+                carga.set()
+                raise
+            with self._lock:
+                del self._cargando[garaje_id]
+                entrada = None
+                if cochera is not None:
+                    self.cargas += 1
+                    entrada = self._agregar(garaje_id, cochera)
+                    entrada.en_uso += 1
+                a_guardar = self._elegir_expulsados()
+            carga.set()
+            self._guardar_expulsados(a_guardar)
+            return entrada
+
+    def _soltar_entrada(self, entrada):
+        """Libera la entrada y actualiza su memoria sólo si la cochera cambió."""
+        eventos = len(entrada.cochera.historial)
+        nueva = None
+        if eventos != entrada.eventos_medidos:
+            nueva = estimar_memoria(entrada.cochera)  # fuera del lock: recorre casillas
+        with self._lock:
+            entrada.en_uso -= 1
+            if nueva is not None:
+                self._memoria += nueva - entrada.memoria
+                entrada.memoria = nueva
+                entrada.eventos_medidos = eventos
+            a_guardar = self._elegir_expulsados()
+        self._guardar_expulsados(a_guardar)
+
+    # -------------------------------
+    #  FUNCIONALIDADES PRINCIPALES
+    # -------------------------------
+    def existe(self, garaje_id):
+        """Retorna True si el garaje está en memoria o guardado en disco."""
+        if not _ID_VALIDO.fullmatch(garaje_id):
+            return False
+        return garaje_id in self._cargados or os.path.exists(self._ruta(garaje_id))
+
+    def crear(self, garaje_id, capacidad_carros=40, capacidad_motos=10,
+              tarifa_carro=250.0, tarifa_moto=150.0):
+        """
+        Crea un garaje nuevo y lo guarda en disco.
+        Retorna la cochera creada o None si ya existía un garaje con ese id.
+        Lanza ValueError si los datos son inválidos y LimiteGarajes si ya se
+        alcanzó la cantidad máxima de garajes.
+        """
+        if not _ID_VALIDO.fullmatch(garaje_id):
+            raise ValueError(
+                "El id del garaje sólo puede tener letras, números, '-' y '_' (máx. 64)")
+        if not (0 <= capacidad_carros <= MAX_CAPACIDAD and 0 <= capacidad_motos <= MAX_CAPACIDAD):
+            raise ValueError(f"Las capacidades deben estar entre 0 y {MAX_CAPACIDAD}")
+        if tarifa_carro < 0 or tarifa_moto < 0:
+            raise ValueError("Las tarifas no pueden ser negativas")
+        with self._lock:
+            if self.existe(garaje_id) or garaje_id in self._cargando:
+                return None
+            cantidad = self._contar_garajes()
+            if self.max_garajes is not None and cantidad >= self.max_garajes:
+                raise LimiteGarajes(f"Se alcanzó el máximo de {self.max_garajes} garajes")
+            self._cantidad = cantidad + 1
+            cochera = Cochera(capacidad_carros, capacidad_motos, tarifa_carro, tarifa_moto)
+            entrada = self._agregar(garaje_id, cochera)
+            entrada.en_uso += 1  # no se expulsa mientras se escribe su primer snapshot
+        try:
+            self._guardar(garaje_id, entrada)
+        finally:
+            self._soltar_entrada(entrada)
+        return cochera
+
+    @contextmanager
+    def usar(self, garaje_id):
+        """
+        Entrega la cochera del garaje (o None si no existe), cargándola si hace falta.
+        Mientras dure el bloque el garaje no se descarga, así ningún cambio se pierde.
+        """
+        if not _ID_VALIDO.fullmatch(garaje_id):
+            yield None
+            return
+        entrada = self._tomar_entrada(garaje_id)
+        if entrada is None:
+            yield None
+            return
+        try:
+            yield entrada.cochera
+        finally:
+            self._soltar_entrada(entrada)
+
+    def guardar_todos(self):
+        """Guarda en disco los garajes en memoria que tengan cambios."""
+        with self._lock:
+            pendientes = [(garaje_id, entrada) for garaje_id, entrada in self._cargados.items()
+                          if entrada.tiene_cambios()]
+            for _, entrada in pendientes:
+                entrada.en_uso += 1
+        for garaje_id, entrada in pendientes:
+            try:
+                self._guardar(garaje_id, entrada)
+            finally:
+                self._soltar_entrada(entrada)
+
+    def estadisticas(self):
+        """Retorna el uso de memoria y contadores del registro."""
+        with self._lock:
+            return {
+                "en_memoria": len(self._cargados),
+                "cargando": len(self._cargando),
+                "memoria_estimada": self._memoria,
+                "presupuesto": self.presupuesto_bytes,
+                "cargas": self.cargas,
+                "expulsiones": self.expulsiones
+            }
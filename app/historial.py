@@ -0,0 +1,170 @@
+# ==========================================
+#  HISTORIAL DE MOVIMIENTOS
+#  Eventos con campos estructurados e índices invertidos
+# ==========================================
+#
+#  Cada evento se guarda por columnas (arrays compactos) y recibe un id
+#  correlativo. Además se mantienen dos índices invertidos:
+#
+#    placa   -> ids de sus eventos
+#    casilla -> ids de sus eventos
+#
+#  Los ids crecen con el tiempo y los tiempos nunca retroceden, así que cada
+#  lista del índice ya está ordenada por tiempo: filtrar por rango de fechas
+#  es una búsqueda binaria y paginar es un slice. Una consulta cuesta
+#  O(log n + página) sin importar cuántos eventos haya en total.
+#
+#  El texto de cada evento ("Registro: CARRO ABC123 asignado a casilla C1.")
+#  se arma a pedido a partir de los campos.
+
+import time
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+
+EVENTOS = ("REGISTRO", "PAGO", "SALIDA", "RESERVA", "CANCELACION")
+TIPOS = ("CARRO", "MOTO")
+
+_CODIGO_EVENTO = {evento: codigo for codigo, evento in enumerate(EVENTOS)}
+_CODIGO_TIPO = {tipo: codigo for codigo, tipo in enumerate(TIPOS)}
+
+
+class Historial:
+    """Historial de eventos de una cochera con índices por placa y por casilla."""
+
+    def __init__(self):
+        self.tiempos = array("d")   # timestamp de cada evento
+        self.eventos = array("B")   # código en EVENTOS
+        self.tipos = array("B")     # código en TIPOS (tipo de vehículo)
+        self.placas = []
+        self.casillas = []
+        self.meses = array("b")     # mes pagado (sólo PAGO)
+        self.anios = array("h")     # año pagado (sólo PAGO)
+        self.reservas = array("q")  # id de reserva (sólo RESERVA y CANCELACION)
+
+        self.por_placa = {}         # placa -> array de ids
+        self.por_casilla = {}       # casilla -> array de ids
+        # Una sola instancia por texto repetido (placas y nombres de casillas)
+        self._textos = {}
+
+    def __len__(self):
+        return len(self.tiempos)
+
+    def __getitem__(self, i):
+        return self.texto(i)
+
+    def __iter__(self):
+        for i in range(len(self.tiempos)):
+            yield self.texto(i)
+
+    # -------------------------------
+    #  REGISTRO DE EVENTOS
+    # -------------------------------
+    def _indexar(self, indice, clave, id_evento):
+        ids = indice.get(clave)
+        if ids is None:
+            ids = indice[clave] = array("q")
+        ids.append(id_evento)
+
+    def registrar(self, evento, tipo, placa, casilla, mes=0, anio=0, reserva=0, tiempo=None):
+        """Agrega un evento y retorna su id."""
+        if tiempo is None:
+            tiempo = time.time()
+        # Los tiempos nunca retroceden (p. ej. si el reloj del sistema se ajusta)
+        if self.tiempos and tiempo < self.tiempos[-1]:
+            tiempo = self.tiempos[-1]
+
+        id_evento = len(self.tiempos)
+        placa = self._textos.setdefault(placa, placa)
+        casilla = self._textos.setdefault(casilla, casilla)
+        self.eventos.append(_CODIGO_EVENTO[evento])
+        self.tipos.append(_CODIGO_TIPO[tipo])
+        self.placas.append(placa)
+        self.casillas.append(casilla)
+        self.meses.append(mes)
+        self.anios.append(anio)
+        self.reservas.append(reserva)
+        # El tiempo va último: len() cuenta sólo eventos con todas sus columnas,
+        # así un export que lee en paralelo nunca ve un evento a medias
+        self.tiempos.append(tiempo)
+        self._indexar(self.por_placa, placa, id_evento)
+        self._indexar(self.por_casilla, casilla, id_evento)
+        return id_evento
+
+    @classmethod
+    def desde_columnas(cls, tiempos, eventos, tipos, placas, casillas, meses, anios, reservas):
+        """Reconstruye el historial (e índices) a partir de sus columnas."""
+        historial = cls()
+        historial.tiempos = array("d", tiempos)
+        historial.eventos = array("B", eventos)
+        historial.tipos = array("B", tipos)
+        historial.meses = array("b", meses)
+        historial.anios = array("h", anios)
+        historial.reservas = array("q", reservas)
+        textos = historial._textos
+        historial.placas = [textos.setdefault(placa, placa) for placa in placas]
+        historial.casillas = [textos.setdefault(casilla, casilla) for casilla in casillas]
+        for indice, columna in ((historial.por_placa, historial.placas),
+                                (historial.por_casilla, historial.casillas)):
+            for id_evento, clave in enumerate(columna):
+                ids = indice.get(clave)
+                if ids is None:
+                    ids = indice[clave] = array("q")
+                ids.append(id_evento)
+        return historial
+
+    # -------------------------------
+    #  LECTURA
+    # -------------------------------
+    def texto(self, i):
+        """Retorna el evento i como texto legible."""
+        evento = EVENTOS[self.eventos[i]]
+        tipo = TIPOS[self.tipos[i]]
+        placa = self.placas[i]
+        casilla = self.casillas[i]
+        if evento == "REGISTRO":
+            return f"Registro: {tipo} {placa} asignado a casilla {casilla}."
+        if evento == "PAGO":
+            return f"Pago: {tipo} {placa} pagó mes {self.meses[i]}/{self.anios[i]} - casilla {casilla}."
+        if evento == "SALIDA":
+            return f"Salida: {tipo} {placa} retirado, se libera casilla {casilla}."
+        if evento == "RESERVA":
+            return f"Reserva: {tipo} {placa} reserva casilla {casilla} (reserva #{self.reservas[i]})."
+        return (f"Cancelación: {tipo} {placa} libera reserva de casilla {casilla} "
+                f"(reserva #{self.reservas[i]}).")
+
+    def evento(self, i):
+        """Retorna el evento i como diccionario para respuesta JSON."""
+        evento = EVENTOS[self.eventos[i]]
+        return {
+            "id": i,
+            "tiempo": datetime.fromtimestamp(self.tiempos[i]).isoformat(),
+            "evento": evento,
+            "tipo": TIPOS[self.tipos[i]],
+            "placa": self.placas[i],
+            "casilla": self.casillas[i],
+            "mes": self.meses[i] if evento == "PAGO" else None,
+            "anio": self.anios[i] if evento == "PAGO" else None,
+            "reserva": self.reservas[i] if evento in ("RESERVA", "CANCELACION") else None,
+            "texto": self.texto(i)
+        }
+
+    def _consultar(self, ids, desde, hasta, offset, limite):
+        """Filtra una lista de ids (ordenada por tiempo) y retorna (total, página)."""
+        if ids is None:
+            return 0, []
+        tiempo = self.tiempos.__getitem__
+        inicio = 0 if desde is None else bisect_left(ids, desde, key=tiempo)
+        fin = len(ids) if hasta is None else bisect_left(ids, hasta, key=tiempo)
+        total = max(0, fin - inicio)
+        pagina = ids[inicio + offset:min(fin, inicio + offset + limite)]
+        return total, [self.evento(i) for i in pagina]
+
+    def de_placa(self, placa, desde=None, hasta=None, offset=0, limite=50):
+        """Eventos de una placa en [desde, hasta) (timestamps). Retorna (total, página)."""
+        return self._consultar(self.por_placa.get(placa.upper()), desde, hasta, offset, limite)
+
+    def de_casilla(self, casilla, desde=None, hasta=None, offset=0, limite=50):
+        """Eventos de una casilla en [desde, hasta) (timestamps). Retorna (total, página)."""
+        return self._consultar(self.por_casilla.get(casilla.upper()), desde, hasta, offset, limite)
+
@@ -0,0 +1,238 @@
+# ==========================================
+#  INGESTA DE EVENTOS DE CÁMARAS LECTORAS DE PLACAS
+#  Cola acotada + micro-lotes + deduplicación + backpressure
+# ==========================================
+#
+#  Las cámaras de entrada y salida mandan eventos en ráfagas. En vez de
+#  aplicar cada evento en su request, se encolan en una asyncio.Queue acotada
+#  y una tarea de fondo los aplica a la cochera en lotes:
+#
+#    - Si la cola no tiene lugar para todos los eventos de la request, se
+#      rechaza completa (backpressure) y la cámara debe reintentar.
+#    - La misma placa leída dos veces por el mismo evento dentro de la
+#      ventana de deduplicación se descarta (varias cámaras en la misma
+#      puerta o lecturas repetidas).
+#    - Cada lote se aplica en un hilo aparte para no bloquear el event loop
+#      mientras llegan más eventos, con el lock de la cochera tomado (el
+#      mismo que usan las rutas que la modifican).
+
+import asyncio
+import logging
+import time
+from collections import deque
+
+EVENTOS = ("ENTRADA", "SALIDA")
+
+logger = logging.getLogger(__name__)
+
+
+class ColaLlena(Exception):
+    """La cola de ingesta no tiene lugar para los eventos recibidos."""
+
+
+class EventoPlaca:
+    """Lectura de una placa por una cámara de entrada o salida."""
+
+    __slots__ = ("placa", "evento", "tipo", "garaje_id", "camara", "recibido")
+
+    def __init__(self, placa, evento, tipo="CARRO", garaje_id=None, camara=None):
+        self.placa = placa.upper()
+        self.evento = evento
+        self.tipo = tipo
+        self.garaje_id = garaje_id
+        self.camara = camara
+        self.recibido = time.monotonic()
+
+
+class PipelineIngesta:
+    """Recibe eventos de placas y los aplica a la cochera en micro-lotes."""
+
+    def __init__(self, usar_cochera, capacidad=10_000, tam_lote=256,
+                 espera_lote=0.005, ventana_dedup=5.0):
+        # usar_cochera(garaje_id) es un context manager que entrega la cochera
+        # (o None si el garaje no existe)
+        self.usar_cochera = usar_cochera
+        self.capacidad = capacidad
+        self.tam_lote = tam_lote
+        self.espera_lote = espera_lote
+        self.ventana_dedup = ventana_dedup
+        self.cola = asyncio.Queue(maxsize=capacidad)
+        # (garaje_id, placa, evento) -> última vez vista. El orden de inserción
+        # coincide con el orden temporal, así que lo viejo está siempre al principio.
+        self._vistos = {}
+        self._lags = deque(maxlen=2048)
+        self._tarea = None
+
+        self.recibidos = 0
+        self.duplicados = 0
+        self.rechazados = 0
+        self.aplicados = 0
+        self.fallidos = 0
+        self.lotes = 0
+        self.lag_maximo = 0.0
+
+    # -------------------------------
+    #  RECEPCIÓN
+    # -------------------------------
+    def _limpiar_vistos(self, ahora):
+        limite = ahora - self.ventana_dedup
+        vistos = self._vistos
+        while vistos:
+            clave = next(iter(vistos))
+            if vistos[clave] >= limite:
+                break
+            del vistos[clave]
+
+    def _es_duplicado(self, evento):
+        clave = (evento.garaje_id, evento.placa, evento.evento)
+        anterior = self._vistos.get(clave)
+        if anterior is not None and evento.recibido - anterior < self.ventana_dedup:
+            return True
+        # Se reinserta al final para mantener el orden temporal
+        self._vistos.pop(clave, None)
+        self._vistos[clave] = evento.recibido
+        return False
+
+    def encolar(self, eventos):
+        """
+        Encola los eventos descartando duplicados.
+        Debe llamarse desde el event loop. Lanza ColaLlena si no hay lugar para
+        todos (no se encola ninguno). Retorna (aceptados, duplicados).
+        """
+        self.recibidos += len(eventos)
+        if self.cola.maxsize - self.cola.qsize() < len(eventos):
+            self.rechazados += len(eventos)
+            raise ColaLlena(f"Cola de ingesta llena ({self.cola.qsize()}/{self.capacidad})")
+
+        self._limpiar_vistos(time.monotonic())
+        aceptados = 0
+        duplicados = 0
+        for evento in eventos:
+            if self._es_duplicado(evento):
+                duplicados += 1
+                continue
+            self.cola.put_nowait(evento)
+            aceptados += 1
+        self.duplicados += duplicados
+        return aceptados, duplicados
+
+    # -------------------------------
+    #  APLICACIÓN EN LOTES
+    # -------------------------------
+    def _aplicar_lote(self, lote):
+        """Aplica un lote agrupado por garaje (una sola toma de cada cochera)."""
+        por_garaje = {}
+        for evento in lote:
+            por_garaje.setdefault(evento.garaje_id, []).append(evento)
+
+        aplicados = 0
+        for garaje_id, eventos in por_garaje.items():
+            # Un garaje que falla (p. ej. su snapshot está corrupto) no frena al
+            # resto del lote: sólo sus eventos pendientes cuentan como fallidos
+            aplicados += self._aplicar_garaje(garaje_id, eventos)
+        return aplicados
+
+    def _aplicar_garaje(self, garaje_id, eventos):
+        """
+        Aplica los eventos de un garaje y retorna cuántos tuvieron efecto.
+        Si falla, registra el error y retorna los que alcanzó a aplicar.
+        """
+        aplicados = 0
+        try:
+            with self.usar_cochera(garaje_id) as cochera:
+                if cochera is None:
+                    return 0
+                # Las rutas HTTP modifican la misma cochera desde otros hilos
+                with cochera.lock:
+                    for evento in eventos:
+                        if evento.evento == "ENTRADA":
+                            # La cámara sólo conoce la placa; los datos del dueño se
+                            # completan después desde la administración
+                            exito = cochera.registrar_vehiculo(
+                                evento.tipo, evento.placa, dueno="", dni="", telefono="",
+                                marca="", modelo="", mes_pagado=0, anio_pagado=0
+                            ) is not None
+                        else:
+                            exito = cochera.eliminar_vehiculo(evento.placa)
+                        aplicados += exito
+        except Exception:
+            logger.exception("Error aplicando eventos del garaje %r (%d de %d aplicados)",
+                             garaje_id, aplicados, len(eventos))
+        return aplicados
+
+    async def _siguiente_lote(self):
+        lote = [await self.cola.get()]
+        # Si el lote quedó chico se espera un instante para juntar más eventos
+        if self.espera_lote and self.cola.qsize() < self.tam_lote - 1:
+            await asyncio.sleep(self.espera_lote)
+        while len(lote) < self.tam_lote and not self.cola.empty():
+            lote.append(self.cola.get_nowait())
+        return lote
+
+    async def ejecutar(self):
+        """Tarea de fondo: toma lotes de la cola y los aplica."""
+        while True:
+            lote = await self._siguiente_lote()
+            try:
+                aplicados = await asyncio.to_thread(self._aplicar_lote, lote)
+            except Exception:
+                logger.exception("Error aplicando lote de ingesta")
+                aplicados = 0
+            ahora = time.monotonic()
+            for evento in lote:
+                lag = ahora - evento.recibido
+                self._lags.append(lag)
+                if lag > self.lag_maximo:
+                    self.lag_maximo = lag
+            self.lotes += 1
+            self.aplicados += aplicados
+            self.fallidos += len(lote) - aplicados
+            for _ in lote:
+                self.cola.task_done()
+
+    def iniciar(self):
+        """Arranca la tarea de fondo en el event loop actual."""
+        if self._tarea is None:
+            # Una cola nueva por arranque: queda ligada al event loop actual
+            self.cola = asyncio.Queue(maxsize=self.capacidad)
+            self._tarea = asyncio.create_task(self.ejecutar())
+
+    async def detener(self, espera=5.0):
+        """Aplica lo que quede en la cola (hasta `espera` segundos) y detiene la tarea."""
+        if self._tarea is None:
+            return
+        try:
+            await asyncio.wait_for(self.cola.join(), espera)
+        except asyncio.TimeoutError:
+            pass
+        self._tarea.cancel()
+        try:
+            await self._tarea
+        except asyncio.CancelledError:
+            pass
+        self._tarea = None
+
+    # -------------------------------
+    #  MÉTRICAS
+    # -------------------------------
+    def metricas(self):
+        """Retorna contadores y lag (tiempo entre recepción y aplicación) en ms."""
+        lags = sorted(self._lags)
+        if lags:
+            lag_p50 = lags[len(lags) // 2]
+            lag_p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))]
+        else:
+            lag_p50 = lag_p99 = 0.0
+        return {
+            "recibidos": self.recibidos,
+            "duplicados": self.duplicados,
+            "rechazados": self.rechazados,
+            "aplicados": self.aplicados,
+            "fallidos": self.fallidos,
+            "lotes": self.lotes,
+            "en_cola": self.cola.qsize(),
+            "capacidad": self.capacidad,
+            "lag_p50_ms": round(lag_p50 * 1000, 3),
+            "lag_p99_ms": round(lag_p99 * 1000, 3),
+            "lag_max_ms": round(self.lag_maximo * 1000, 3)
+        }
@@ -4,19 +4,100 @@
 #  API REST con FastAPI
 # ==========================================
 
-from fastapi import FastAPI, HTTPException
+# Va primero: marca el inicio de la medición del arranque (incluye importar FastAPI)
+from app.arranque import Arranque  # isort: skip
+
+import hmac
+import os
+import secrets
+import time
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from app import export
+from app.garajes import LimiteGarajes, RegistroGarajes
+from app.ingesta import EVENTOS, ColaLlena, EventoPlaca, PipelineIngesta
 from app.models import Cochera
+from app.seguridad import FirmadorTokens, LimitadorTasa, MiddlewareAcceso
+from app.snapshot import SnapshotError
 from app.schemas import (
     VehiculoRequest, VehiculoResponse, PagoRequest,
-    DeudoresRequest, ResumenResponse, LoginRequest, LoginResponse
+    DeudoresRequest, ResumenResponse, LoginRequest, LoginResponse,
+    GarajeRequest, EventoPlacaRequest, ReservaRequest
 )
 
+arranque = Arranque(os.environ.get("APPARKALA_ARRANQUE", "normal"))
+arranque.marcar("imports")
+
+# ==========================================
+#  SEGURIDAD: TOKENS DE SESIÓN Y LÍMITE DE TASA
+# ==========================================
+
+# Sin APPARKALA_SECRETO se usa uno aleatorio: los tokens dejan de valer al
+# reiniciar y no sirven entre varios procesos
+_SECRETO = os.environ.get("APPARKALA_SECRETO")
+firmador = FirmadorTokens(
+    _SECRETO.encode("utf-8") if _SECRETO else secrets.token_bytes(32),
+    duracion=int(os.environ.get("APPARKALA_TOKEN_HORAS", "12")) * 3600
+)
+
+# Requests por segundo y ráfaga por cliente (APPARKALA_TASA=0 desactiva el límite)
+_TASA = float(os.environ.get("APPARKALA_TASA", "20"))
+limitador = LimitadorTasa(
+    _TASA, float(os.environ.get("APPARKALA_RAFAGA", "40"))
+) if _TASA > 0 else None
+
+# Con APPARKALA_EXIGIR_TOKEN=1 todas las rutas salvo las públicas piden token
+EXIGIR_TOKEN = os.environ.get("APPARKALA_EXIGIR_TOKEN") == "1"
+RUTAS_PUBLICAS = {"/", "/login", "/healthz", "/readyz"}
+# Administración y alta de garajes piden token siempre, aunque EXIGIR_TOKEN esté apagado
+PREFIJOS_CON_TOKEN = ("/admin/",)
+RUTAS_CON_TOKEN = {("POST", "/garajes")}
+# La ingesta de cámaras ya tiene su propio backpressure (503 con la cola llena).
+# Sólo se saltean el límite de tasa: con EXIGIR_TOKEN también piden token.
+RUTAS_SIN_LIMITE = {"/healthz", "/readyz", "/ingesta/eventos"}
+# Proxies de confianza delante del servidor (1 en Render): la IP del cliente
+# se toma de X-Forwarded-For contando desde la derecha
+PROXIES = int(os.environ.get("APPARKALA_PROXIES", "0"))
+
 # ==========================================
 #  CONFIGURACIÓN DE FASTAPI
 # ==========================================
 
-app = FastAPI(title="Sistema de Gestión de Cochera Apparkala", version="1.0.0")
+@asynccontextmanager
+async def ciclo_de_vida(app):
+    """
+    Arranca la ingesta de eventos de cámaras y carga el estado guardado (en
+    segundo plano en modo rápido). Al apagar el servidor aplica los eventos
+    pendientes y guarda los garajes con cambios.
+    """
+    ingesta.iniciar()
+    arranque.iniciar(cargar_estado_guardado, diferidas=[("openapi", app.openapi)])
+    yield
+    await ingesta.detener()
+    garajes.guardar_todos()
+
+
+app = FastAPI(title="Sistema de Gestión de Cochera Apparkala", version="1.0.0",
+              lifespan=ciclo_de_vida)
+
+# Token y límite de tasa antes del ruteo; CORS queda por fuera para que las
+# respuestas 401/429 también lleven sus cabeceras
+app.add_middleware(
+    MiddlewareAcceso,
+    firmador=firmador,
+    limitador=limitador,
+    exigir_token=EXIGIR_TOKEN,
+    rutas_publicas=RUTAS_PUBLICAS,
+    rutas_sin_limite=RUTAS_SIN_LIMITE,
+    proxies=PROXIES,
+    prefijos_con_token=PREFIJOS_CON_TOKEN,
+    rutas_con_token=RUTAS_CON_TOKEN
+)
 
 # Configurar CORS para permitir conexiones desde frontend
 app.add_middleware(
@@ -33,6 +114,81 @@ app.add_middleware(
 
 cochera = Cochera()
 
+# Ruta del snapshot binario usado por los endpoints de administración
+RUTA_SNAPSHOT = os.environ.get("APPARKALA_SNAPSHOT", "cochera.snapshot")
+
+# Reservas que ya le quitan su casilla a los vehículos sin reserva (por defecto
+# las que empiezan en las próximas 24 horas)
+Cochera.horizonte_reservas = float(
+    os.environ.get("APPARKALA_HORIZONTE_RESERVAS_HORAS", "24")) * 3600
+
+# Máximo que la ingesta espera a que se cargue el estado al arrancar (segundos)
+ESPERA_ESTADO = 60.0
+
+
+def cargar_estado_guardado():
+    """Carga el último snapshot guardado (si existe) en la cochera global."""
+    global cochera
+    if os.path.exists(RUTA_SNAPSHOT):
+        cochera = Cochera.from_snapshot(RUTA_SNAPSHOT)
+
+
+def verificar_listo():
+    """Responde 503 mientras la cochera global todavía se está cargando."""
+    if not arranque.esta_listo():
+        raise HTTPException(
+            status_code=503, detail="El servidor está cargando su estado",
+            headers={"Retry-After": "1"})
+
+# ==========================================
+#  GARAJES (VARIAS COCHERAS EN EL MISMO PROCESO)
+# ==========================================
+
+garajes = RegistroGarajes(
+    carpeta=os.environ.get("APPARKALA_GARAJES", "garajes"),
+    presupuesto_bytes=int(os.environ.get("APPARKALA_MEMORIA_GARAJES_MB", "256")) * 1024 * 1024,
+    max_garajes=int(os.environ.get("APPARKALA_MAX_GARAJES", "10000"))
+)
+
+
+@contextmanager
+def usar_cochera(garaje_id):
+    """Entrega la cochera global (garaje_id None) o la del garaje indicado."""
+    if garaje_id is None:
+        # La ingesta puede llegar antes de que termine la carga del estado
+        yield cochera if arranque.esperar(ESPERA_ESTADO) else None
+        return
+    with garajes.usar(garaje_id) as cochera_garaje:
+        yield cochera_garaje
+
+
+def obtener_cochera(request: Request):
+    """
+    Resuelve la cochera de la request: la global para las rutas de siempre o
+    la del garaje para las rutas bajo /garajes/{garaje_id}.
+    """
+    garaje_id = request.path_params.get("garaje_id")
+    if garaje_id is None:
+        verificar_listo()
+    with usar_cochera(garaje_id) as cochera_request:
+        if cochera_request is None:
+            raise HTTPException(status_code=404, detail="No existe el garaje")
+        yield cochera_request
+
+
+# ==========================================
+#  INGESTA DE CÁMARAS LECTORAS DE PLACAS
+# ==========================================
+
+ingesta = PipelineIngesta(
+    usar_cochera,
+    capacidad=int(os.environ.get("APPARKALA_INGESTA_CAPACIDAD", "10000"))
+)
+
+
+# Endpoints que funcionan igual para la cochera global y para cada garaje
+router = APIRouter()
+
 # ==========================================
 #  ENDPOINTS DE LA API
 # ==========================================
@@ -44,14 +200,38 @@ def root():
     return {"message": "Sistema de Gestión de Cochera Apparkala API", "version": "1.0.0"}
 
 
+@app.get("/healthz")
+def healthz():
+    """Liveness: el proceso está vivo y atiende requests."""
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+def readyz():
+    """Readiness: 200 cuando el estado está cargado, 503 mientras tanto."""
+    resumen = arranque.resumen()
+    if not resumen["listo"]:
+        return JSONResponse(status_code=503, content=resumen, headers={"Retry-After": "1"})
+    return resumen
+
+
 @app.post("/login", response_model=LoginResponse)
 def login(credentials: LoginRequest):
-    """Endpoint de autenticación. Usuario: admin, Contraseña: 12345678"""
-    if credentials.username == "admin" and credentials.password == "12345678":
+    """
+    Endpoint de autenticación. Usuario: admin, Contraseña: 12345678
+    Retorna un token de sesión para enviar como "Authorization: Bearer <token>".
+    """
+    # compare_digest: el tiempo de la comparación no revela cuántos caracteres coinciden
+    usuario_ok = hmac.compare_digest(credentials.username.encode("utf-8"), b"admin")
+    clave_ok = hmac.compare_digest(credentials.password.encode("utf-8"), b"12345678")
+    if usuario_ok and clave_ok:
+        token, expira = firmador.emitir(credentials.username)
         return {
             "message": "Login exitoso",
             "state": True,
-            "user": credentials.username
+            "user": credentials.username,
+            "token": token,
+            "expira": datetime.fromtimestamp(expira)
         }
     raise HTTPException(
         status_code=401,
@@ -59,28 +239,31 @@ def login(credentials: LoginRequest):
     )
 
 
-@app.post("/vehiculos", response_model=VehiculoResponse, status_code=201)
-def registrar_vehiculo(vehiculo: VehiculoRequest):
+@router.post("/vehiculos", response_model=VehiculoResponse, status_code=201)
+def registrar_vehiculo(vehiculo: VehiculoRequest, cochera: Cochera = Depends(obtener_cochera)):
     """Registra un nuevo vehículo en el sistema."""
     if vehiculo.tipo not in ["CARRO", "MOTO"]:
         raise HTTPException(
             status_code=400, detail="Tipo de vehículo inválido. Debe ser 'CARRO' o 'MOTO'")
 
-    veh = cochera.registrar_vehiculo(
-        tipo=vehiculo.tipo,
-        placa=vehiculo.placa,
-        dueno=vehiculo.dueno,
-        dni=vehiculo.dni,
-        telefono=vehiculo.telefono,
-        marca=vehiculo.marca,
-        modelo=vehiculo.modelo,
-        mes_pagado=vehiculo.mes_pagado,
-        anio_pagado=vehiculo.anio_pagado
-    )
+    with cochera.lock:
+        veh = cochera.registrar_vehiculo(
+            tipo=vehiculo.tipo,
+            placa=vehiculo.placa,
+            dueno=vehiculo.dueno,
+            dni=vehiculo.dni,
+            telefono=vehiculo.telefono,
+            marca=vehiculo.marca,
+            modelo=vehiculo.modelo,
+            mes_pagado=vehiculo.mes_pagado,
+            anio_pagado=vehiculo.anio_pagado
+        )
+        # Verificar si falló por placa duplicada o sin espacio
+        tipo_existente = None
+        if veh is None:
+            tipo_existente, _, _ = cochera._buscar_vehiculo_por_placa(vehiculo.placa)  # noqa: SLF001
 
     if veh is None:
-        # Verificar si es por placa duplicada o sin espacio
-        tipo_existente, _, _ = cochera._buscar_vehiculo_por_placa(vehiculo.placa)  # noqa: SLF001
         if tipo_existente is not None:
             raise HTTPException(
                 status_code=400, detail="Ya existe un vehículo con esa placa")
@@ -90,20 +273,20 @@ def registrar_vehiculo(vehiculo: VehiculoRequest):
     return veh.to_dict()
 
 
-@app.get("/casillas")
-def obtener_casillas():
+@router.get("/casillas")
+def obtener_casillas(cochera: Cochera = Depends(obtener_cochera)):
     """Obtiene el estado de todas las casillas."""
     return cochera.obtener_casillas()
 
 
-@app.get("/casillas/libres")
-def obtener_casillas_libres():
+@router.get("/casillas/libres")
+def obtener_casillas_libres(cochera: Cochera = Depends(obtener_cochera)):
     """Obtiene las casillas libres."""
     return cochera.obtener_casillas_libres()
 
 
-@app.get("/vehiculos/{placa}", response_model=VehiculoResponse)
-def buscar_vehiculo(placa: str):
+@router.get("/vehiculos/{placa}", response_model=VehiculoResponse)
+def buscar_vehiculo(placa: str, cochera: Cochera = Depends(obtener_cochera)):
     """Busca un vehículo por su placa."""
     veh = cochera.buscar_por_placa(placa)
     if veh is None:
@@ -112,8 +295,8 @@ def buscar_vehiculo(placa: str):
     return veh.to_dict()
 
 
-@app.post("/pagos")
-def registrar_pago(pago: PagoRequest):
+@router.post("/pagos")
+def registrar_pago(pago: PagoRequest, cochera: Cochera = Depends(obtener_cochera)):
     """Registra un pago de mensualidad para un vehículo."""
     if not (1 <= pago.mes <= 12):
         raise HTTPException(
@@ -122,7 +305,8 @@ def registrar_pago(pago: PagoRequest):
     if pago.anio < 2000 or pago.anio > 2100:
         raise HTTPException(status_code=400, detail="Año inválido")
 
-    exito = cochera.registrar_pago(pago.placa, pago.mes, pago.anio)
+    with cochera.lock:
+        exito = cochera.registrar_pago(pago.placa, pago.mes, pago.anio)
     if not exito:
         raise HTTPException(
             status_code=404, detail="No se encontró vehículo con esa placa")
@@ -130,8 +314,8 @@ def registrar_pago(pago: PagoRequest):
     return {"message": f"Pago registrado correctamente para {pago.placa}", "state": True}
 
 
-@app.post("/deudores")
-def obtener_deudores(request: DeudoresRequest):
+@router.post("/deudores")
+def obtener_deudores(request: DeudoresRequest, cochera: Cochera = Depends(obtener_cochera)):
     """Obtiene la lista de deudores según el mes y año actual."""
     if not (1 <= request.mes_actual <= 12):
         raise HTTPException(
@@ -145,10 +329,11 @@ def obtener_deudores(request: DeudoresRequest):
     return deudores
 
 
-@app.delete("/vehiculos/{placa}")
-def eliminar_vehiculo(placa: str):
+@router.delete("/vehiculos/{placa}")
+def eliminar_vehiculo(placa: str, cochera: Cochera = Depends(obtener_cochera)):
     """Elimina un vehículo del sistema (libera la casilla)."""
-    exito = cochera.eliminar_vehiculo(placa)
+    with cochera.lock:
+        exito = cochera.eliminar_vehiculo(placa)
     if not exito:
         raise HTTPException(
             status_code=404, detail="No se encontró vehículo con esa placa")
@@ -156,14 +341,278 @@ def eliminar_vehiculo(placa: str):
     return {"message": f"Vehículo {placa} eliminado del sistema", "state": True}
 
 
-@app.get("/resumen", response_model=ResumenResponse)
-def obtener_resumen():
+@router.get("/resumen", response_model=ResumenResponse)
+def obtener_resumen(cochera: Cochera = Depends(obtener_cochera)):
     """Obtiene un resumen de la cochera."""
     resumen = cochera.obtener_resumen()
     return resumen
 
 
-@app.get("/historial")
-def obtener_historial():
+@router.get("/historial")
+def obtener_historial(cochera: Cochera = Depends(obtener_cochera)):
     """Obtiene el historial de movimientos."""
     return {"historial": cochera.obtener_historial()}
+
+
+def _consulta_historial(consulta, clave, desde, hasta, offset, limite):
+    """Valida los parámetros y arma la respuesta paginada del historial."""
+    if not (1 <= limite <= 1000):
+        raise HTTPException(
+            status_code=400, detail="El límite debe estar entre 1 y 1000")
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="El offset no puede ser negativo")
+
+    total, eventos = consulta(
+        clave,
+        desde.timestamp() if desde is not None else None,
+        hasta.timestamp() if hasta is not None else None,
+        offset, limite
+    )
+    return {"total": total, "offset": offset, "limite": limite, "eventos": eventos}
+
+
+@router.get("/vehiculos/{placa}/historial")
+def obtener_historial_de_placa(placa: str, desde: Optional[datetime] = None,
+                               hasta: Optional[datetime] = None, offset: int = 0,
+                               limite: int = 50, cochera: Cochera = Depends(obtener_cochera)):
+    """Obtiene los eventos de una placa en [desde, hasta), paginados."""
+    return _consulta_historial(cochera.obtener_historial_de_placa, placa,
+                               desde, hasta, offset, limite)
+
+
+@router.get("/casillas/{nombre}/historial")
+def obtener_historial_de_casilla(nombre: str, desde: Optional[datetime] = None,
+                                 hasta: Optional[datetime] = None, offset: int = 0,
+                                 limite: int = 50, cochera: Cochera = Depends(obtener_cochera)):
+    """Obtiene los eventos de una casilla (p. ej. C1) en [desde, hasta), paginados."""
+    return _consulta_historial(cochera.obtener_historial_de_casilla, nombre,
+                               desde, hasta, offset, limite)
+
+
+# ==========================================
+#  RESERVAS
+# ==========================================
+
+
+def _validar_reserva(tipo, inicio, fin):
+    """Valida tipo e intervalo de una reserva y retorna (inicio, fin) como timestamps."""
+    if tipo not in ["CARRO", "MOTO"]:
+        raise HTTPException(
+            status_code=400, detail="Tipo de vehículo inválido. Debe ser 'CARRO' o 'MOTO'")
+
+    inicio_ts = inicio.timestamp()
+    fin_ts = fin.timestamp()
+    if fin_ts <= inicio_ts:
+        raise HTTPException(
+            status_code=400, detail="El fin de la reserva debe ser posterior al inicio")
+
+    if fin_ts <= time.time():
+        raise HTTPException(status_code=400, detail="La reserva ya terminó")
+
+    return inicio_ts, fin_ts
+
+
+@router.post("/reservas", status_code=201)
+def crear_reserva(reserva: ReservaRequest, cochera: Cochera = Depends(obtener_cochera)):
+    """Reserva una casilla libre para una placa en un intervalo de tiempo."""
+    inicio, fin = _validar_reserva(reserva.tipo, reserva.inicio, reserva.fin)
+    with cochera.lock:
+        creada = cochera.crear_reserva(reserva.tipo, reserva.placa, inicio, fin)
+        # Verificar si falló porque la placa ya tiene una reserva en ese horario
+        cruzada = None
+        if creada is None:
+            cruzada = cochera._reserva_de_placa_que_se_cruza(reserva.placa, inicio, fin)  # noqa: SLF001
+    if cruzada is not None:
+        raise HTTPException(
+            status_code=400, detail=f"La placa ya tiene la reserva {cruzada.id} en ese horario")
+    if creada is None:
+        raise HTTPException(
+            status_code=400, detail=f"No hay casillas de {reserva.tipo.lower()}s disponibles en ese horario")
+    return creada.to_dict()
+
+
+@router.get("/reservas")
+def obtener_reservas(cochera: Cochera = Depends(obtener_cochera)):
+    """Obtiene todas las reservas ordenadas por inicio."""
+    return {"reservas": cochera.obtener_reservas()}
+
+
+@router.get("/reservas/disponible")
+def buscar_casilla_disponible(tipo: str, inicio: datetime, fin: datetime,
+                              cochera: Cochera = Depends(obtener_cochera)):
+    """Busca una casilla libre en el intervalo indicado."""
+    inicio_ts, fin_ts = _validar_reserva(tipo, inicio, fin)
+    casilla = cochera.buscar_casilla_disponible(tipo, inicio_ts, fin_ts)
+    return {"disponible": casilla is not None, "casilla": casilla}
+
+
+@router.delete("/reservas/{reserva_id}")
+def cancelar_reserva(reserva_id: int, cochera: Cochera = Depends(obtener_cochera)):
+    """Cancela una reserva."""
+    with cochera.lock:
+        cancelada = cochera.cancelar_reserva(reserva_id)
+    if not cancelada:
+        raise HTTPException(status_code=404, detail="No se encontró la reserva")
+    return {"message": f"Reserva {reserva_id} cancelada", "state": True}
+
+
+# ==========================================
+#  EXPORTS EN STREAMING (NDJSON / CSV)
+# ==========================================
+
+
+def _respuesta_export(bloques, formato, nombre):
+    """Arma la respuesta en streaming (sin Content-Length: va en chunks)."""
+    return StreamingResponse(
+        bloques,
+        media_type=export.TIPOS_CONTENIDO[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nombre}.{formato}"'}
+    )
+
+
+def _validar_formato(formato):
+    if formato not in export.FORMATOS:
+        raise HTTPException(
+            status_code=400, detail="Formato inválido. Debe ser 'ndjson' o 'csv'")
+
+
+@router.get("/export/vehiculos")
+def exportar_vehiculos(formato: str = "ndjson", cochera: Cochera = Depends(obtener_cochera)):
+    """Exporta todos los vehículos en streaming."""
+    _validar_formato(formato)
+    return _respuesta_export(export.exportar_vehiculos(cochera, formato), formato, "vehiculos")
+
+
+@router.get("/export/historial")
+def exportar_historial(formato: str = "ndjson", cochera: Cochera = Depends(obtener_cochera)):
+    """Exporta el historial de movimientos en streaming."""
+    _validar_formato(formato)
+    return _respuesta_export(export.exportar_historial(cochera, formato), formato, "historial")
+
+
+@router.get("/export/deudores")
+def exportar_deudores(mes_actual: int, anio_actual: int, formato: str = "ndjson",
+                      cochera: Cochera = Depends(obtener_cochera)):
+    """Exporta los deudores según el mes y año actual en streaming."""
+    _validar_formato(formato)
+    if not (1 <= mes_actual <= 12):
+        raise HTTPException(
+            status_code=400, detail="El mes debe estar entre 1 y 12")
+
+    if anio_actual < 2000 or anio_actual > 2100:
+        raise HTTPException(status_code=400, detail="Año inválido")
+
+    bloques = export.exportar_deudores(cochera, mes_actual, anio_actual, formato)
+    return _respuesta_export(bloques, formato, "deudores")
+
+
+# ==========================================
+#  INGESTA DE EVENTOS
+# ==========================================
+
+
+@app.post("/ingesta/eventos", status_code=202)
+async def recibir_eventos(eventos: List[EventoPlacaRequest]):
+    """
+    Recibe lecturas de placas de las cámaras y las encola para aplicarlas.
+    Si la cola está llena responde 503 y la cámara debe reintentar luego.
+    """
+    for evento in eventos:
+        if evento.evento not in EVENTOS:
+            raise HTTPException(
+                status_code=400, detail="Evento inválido. Debe ser 'ENTRADA' o 'SALIDA'")
+        if evento.tipo not in ["CARRO", "MOTO"]:
+            raise HTTPException(
+                status_code=400, detail="Tipo de vehículo inválido. Debe ser 'CARRO' o 'MOTO'")
+
+    try:
+        aceptados, duplicados = ingesta.encolar([
+            EventoPlaca(e.placa, e.evento, e.tipo, e.garaje_id, e.camara) for e in eventos
+        ])
+    except ColaLlena as error:
+        raise HTTPException(status_code=503, detail=str(error), headers={"Retry-After": "1"})
+
+    return {"aceptados": aceptados, "duplicados": duplicados, "state": True}
+
+
+@app.get("/ingesta/metricas")
+def metricas_ingesta():
+    """Muestra contadores de la ingesta y el lag entre recepción y aplicación."""
+    return ingesta.metricas()
+
+
+# ==========================================
+#  GARAJES
+# ==========================================
+
+
+@app.post("/garajes", status_code=201)
+def crear_garaje(garaje: GarajeRequest):
+    """Crea un garaje nuevo con sus propias capacidades y tarifas."""
+    try:
+        creada = garajes.crear(
+            garaje.id,
+            capacidad_carros=garaje.capacidad_carros,
+            capacidad_motos=garaje.capacidad_motos,
+            tarifa_carro=garaje.tarifa_carro,
+            tarifa_moto=garaje.tarifa_moto
+        )
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    except LimiteGarajes as error:
+        raise HTTPException(status_code=403, detail=str(error))
+
+    if creada is None:
+        raise HTTPException(status_code=400, detail="Ya existe un garaje con ese id")
+
+    return {"message": f"Garaje {garaje.id} creado", "state": True}
+
+
+@app.get("/admin/limites")
+def metricas_limites():
+    """Muestra la configuración y contadores del límite de tasa."""
+    if limitador is None:
+        return {"activo": False}
+    return {"activo": True, **limitador.metricas()}
+
+
+@app.get("/admin/garajes")
+def estadisticas_garajes():
+    """Muestra cuántos garajes hay en memoria y cuánta memoria estimada usan."""
+    return garajes.estadisticas()
+
+
+# Las mismas rutas sirven a la cochera global y a cada garaje
+app.include_router(router)
+app.include_router(router, prefix="/garajes/{garaje_id}")
+
+
+# ==========================================
+#  ADMINISTRACIÓN: SNAPSHOTS
+# ==========================================
+
+
+@app.post("/admin/snapshot")
+def guardar_snapshot():
+    """Guarda el estado completo de la cochera en un snapshot binario."""
+    verificar_listo()
+    with cochera.lock:
+        tamanio = cochera.to_snapshot(RUTA_SNAPSHOT)
+    return {"message": "Snapshot guardado", "state": True, "ruta": RUTA_SNAPSHOT, "bytes": tamanio}
+
+
+@app.post("/admin/snapshot/restaurar")
+def restaurar_snapshot():
+    """Reemplaza el estado de la cochera por el del último snapshot guardado."""
+    global cochera
+    verificar_listo()
+    if not os.path.exists(RUTA_SNAPSHOT):
+        raise HTTPException(status_code=404, detail="No existe un snapshot guardado")
+    try:
+        cochera = Cochera.from_snapshot(RUTA_SNAPSHOT)
+    except SnapshotError as error:
+        raise HTTPException(status_code=400, detail=f"Snapshot inválido: {error}")
+    return {"message": "Snapshot restaurado", "state": True, "ruta": RUTA_SNAPSHOT}
+
+
+arranque.marcar("app")
@@ -3,6 +3,14 @@
 #  Clases que representan la lógica de negocio
 # ==========================================
 
+import copy
+import threading
+import time
+from bisect import bisect_right
+
+from app.historial import Historial
+from app.reservas import AgendaCasilla, IndiceHuecos, Reserva
+
 
 class Vehiculo:
     """Representa un vehículo en el sistema de cochera."""
@@ -54,31 +62,159 @@ class Vehiculo:
 class Cochera:
     """Gestiona las casillas y vehículos de la cochera."""
 
-    def __init__(self):
+    # Un vehículo registrado ocupa su casilla sin fecha de salida, así que no
+    # se le asignan casillas con reservas vigentes o que empiezan dentro de
+    # este horizonte (segundos). Las reservas más lejanas no bloquean hoy la
+    # casilla: si al llegar su hora está ocupada, la placa recibe otra libre.
+    horizonte_reservas = 24 * 3600
+
+    def __init__(self, capacidad_carros=40, capacidad_motos=10,
+                 tarifa_carro=250.0, tarifa_moto=150.0):
         # None = casilla libre / Vehiculo = casilla ocupada
-        self.casillas_carros = [None] * 40   # C1..C40
-        self.casillas_motos = [None] * 10    # M1..M10
-        self.historial = []                  # lista de textos con eventos
+        self.casillas_carros = [None] * capacidad_carros   # C1..C40
+        self.casillas_motos = [None] * capacidad_motos     # M1..M10
+        self.historial = Historial()         # eventos indexados por placa y casilla
 
         # Tarifas base (puedes cambiarlas a gusto)
-        self.tarifa_carro = 250.0
-        self.tarifa_moto = 150.0
+        self.tarifa_carro = tarifa_carro
+        self.tarifa_moto = tarifa_moto
+
+        # Reservas: id -> Reserva, más una agenda ordenada por casilla
+        # (sólo para las casillas que alguna vez tuvieron reservas)
+        self.reservas = {}
+        self.reservas_por_placa = {}         # placa -> lista de Reserva
+        self.agendas_carros = {}             # índice 0.. -> AgendaCasilla
+        self.agendas_motos = {}
+        # tipo -> IndiceHuecos; se crea con la primera reserva del tipo
+        self.indices_huecos = {}
+        self.siguiente_reserva = 1
+
+        # Lo toman las rutas que modifican la cochera y la ingesta de cámaras,
+        # que aplica sus lotes desde otro hilo
+        self.lock = threading.Lock()
 
     # -------------------------------
     #  FUNCIONES DE APOYO INTERNAS
     # -------------------------------
-    def _buscar_casilla_libre(self, tipo):
-        """Busca la primera casilla libre del tipo especificado."""
+    def _casillas_y_agendas(self, tipo):
+        """Retorna (casillas, agendas) del tipo o (None, None) si el tipo no existe."""
         if tipo == "CARRO":
-            for i in range(len(self.casillas_carros)):
-                if self.casillas_carros[i] is None:
-                    return i  # índice 0..39
-        elif tipo == "MOTO":
-            for i in range(len(self.casillas_motos)):
-                if self.casillas_motos[i] is None:
-                    return i  # índice 0..9
+            return self.casillas_carros, self.agendas_carros
+        if tipo == "MOTO":
+            return self.casillas_motos, self.agendas_motos
+        return None, None
+
+    def _buscar_casilla_libre(self, tipo, ahora=None):
+        """
+        Busca la primera casilla libre del tipo especificado.
+        Si el tipo tiene reservas se saltan las casillas con reservas vigentes o
+        que empiezan dentro de `horizonte_reservas`.
+        """
+        indice_huecos = self.indices_huecos.get(tipo)
+        if indice_huecos is not None:
+            if ahora is None:
+                ahora = time.time()
+            return indice_huecos.buscar(ahora, ahora + self.horizonte_reservas)
+
+        casillas, _ = self._casillas_y_agendas(tipo)
+        if casillas is None:
+            return None
+        for i in range(len(casillas)):
+            if casillas[i] is None:
+                return i  # índice 0..n-1
+        return None
+
+    def _buscar_casilla_disponible(self, tipo, inicio, fin):
+        """Busca una casilla libre sin reservas que se crucen con [inicio, fin)."""
+        indice_huecos = self.indices_huecos.get(tipo)
+        if indice_huecos is None:
+            # Sin reservas de este tipo cualquier casilla libre sirve
+            return self._buscar_casilla_libre(tipo)
+        return indice_huecos.buscar(inicio, fin)
+
+    def _reindexar_casilla(self, tipo, indice):
+        """Actualiza los huecos indexados de una casilla tras un cambio."""
+        indice_huecos = self.indices_huecos.get(tipo)
+        if indice_huecos is None:
+            return
+        casillas, agendas = self._casillas_y_agendas(tipo)
+        if casillas[indice] is not None:
+            indice_huecos.reemplazar(indice, [])  # ocupada: no está disponible
+        elif indice in agendas:
+            indice_huecos.reemplazar(indice, agendas[indice].huecos())
+        else:
+            indice_huecos.reemplazar(indice, [(float("-inf"), float("inf"))])
+
+    def _indexar_huecos(self, tipo):
+        """Crea el índice de huecos del tipo (se hace con la primera reserva)."""
+        self.indices_huecos[tipo] = IndiceHuecos()
+        casillas, _ = self._casillas_y_agendas(tipo)
+        for i in range(len(casillas)):
+            self._reindexar_casilla(tipo, i)
+
+    def _reserva_vigente_de_placa(self, placa, tipo, ahora):
+        """Retorna la reserva de la placa vigente en este momento o None."""
+        for reserva in self.reservas_por_placa.get(placa, []):
+            if reserva.casilla_tipo == tipo and reserva.inicio <= ahora < reserva.fin:
+                return reserva
+        return None
+
+    def _reserva_que_bloquea(self, agendas, indice, ahora):
+        """
+        Retorna la reserva vigente o próxima de la casilla si empieza dentro de
+        `horizonte_reservas` (la casilla no se asigna sin reserva) o None.
+        """
+        agenda = agendas.get(indice)
+        if agenda is None:
+            return None
+        # Las reservas no se solapan: los fines quedan ordenados igual que los inicios
+        i = bisect_right(agenda.fines, ahora)
+        if i < len(agenda) and agenda.inicios[i] < ahora + self.horizonte_reservas:
+            return agenda.reservas[i]
+        return None
+
+    def _reserva_de_placa_que_se_cruza(self, placa, inicio, fin):
+        """Retorna una reserva de la placa (de cualquier tipo) que se cruce con [inicio, fin)."""
+        for reserva in self.reservas_por_placa.get(placa.upper(), []):
+            if reserva.inicio < fin and inicio < reserva.fin:
+                return reserva
         return None
 
+    def _quitar_reserva(self, reserva):
+        """Quita una reserva de su agenda, del índice de huecos y de los diccionarios."""
+        tipo = reserva.casilla_tipo
+        indice = reserva.casilla_numero - 1
+        _, agendas = self._casillas_y_agendas(tipo)
+        agenda = agendas[indice]
+        agenda.quitar(reserva)
+        if len(agenda) == 0:
+            del agendas[indice]
+        self._olvidar_reserva(reserva)
+        self._reindexar_casilla(tipo, indice)
+
+    def _olvidar_reserva(self, reserva):
+        """Quita una reserva (que ya no está en su agenda) de los diccionarios."""
+        del self.reservas[reserva.id]
+        de_la_placa = self.reservas_por_placa[reserva.placa]
+        de_la_placa.remove(reserva)
+        if not de_la_placa:
+            del self.reservas_por_placa[reserva.placa]
+
+    def _agregar_reserva(self, reserva):
+        """Agrega una reserva ya validada a la agenda y a los índices."""
+        tipo = reserva.casilla_tipo
+        indice = reserva.casilla_numero - 1
+        if tipo not in self.indices_huecos:
+            self._indexar_huecos(tipo)
+        _, agendas = self._casillas_y_agendas(tipo)
+        agenda = agendas.get(indice)
+        if agenda is None:
+            agenda = agendas[indice] = AgendaCasilla()
+        agenda.agregar(reserva)
+        self.reservas[reserva.id] = reserva
+        self.reservas_por_placa.setdefault(reserva.placa, []).append(reserva)
+        self._reindexar_casilla(tipo, indice)
+
     def _buscar_vehiculo_por_placa(self, placa):
         """Busca un vehículo por su placa. Retorna (tipo, indice, vehiculo) o (None, None, None)."""
         # Buscar primero en carros
@@ -105,7 +241,15 @@ class Cochera:
         if tipo_existente is not None:
             return None  # Placa ya existe
 
-        indice = self._buscar_casilla_libre(tipo)
+        # Si la placa tiene una reserva vigente se le asigna esa casilla
+        ahora = time.time()
+        casillas, _ = self._casillas_y_agendas(tipo)
+        reserva = self._reserva_vigente_de_placa(placa.upper(), tipo, ahora)
+        if reserva is not None and casillas[reserva.casilla_numero - 1] is None:
+            indice = reserva.casilla_numero - 1
+            self._quitar_reserva(reserva)
+        else:
+            indice = self._buscar_casilla_libre(tipo, ahora)
         if indice is None:
             return None  # No hay casillas libres
 
@@ -139,65 +283,91 @@ class Cochera:
         else:
             self.casillas_motos[indice] = veh
             nombre_casilla = f"M{casilla_numero}"
+        self._reindexar_casilla(tipo, indice)
 
-        self.historial.append(
-            f"Registro: {veh.tipo} {veh.placa} asignado a casilla {nombre_casilla}."
-        )
+        self.historial.registrar("REGISTRO", veh.tipo, veh.placa, nombre_casilla)
 
         return veh
 
     def obtener_casillas(self):
-        """Retorna el estado de todas las casillas."""
+        """
+        Retorna el estado de todas las casillas.
+        Una casilla libre con una reserva vigente o que empieza dentro de
+        `horizonte_reservas` figura como RESERVADA (con la placa de esa reserva):
+        no se asigna a vehículos sin reserva.
+        """
+        ahora = time.time()
         casillas_carros = []
         casillas_motos = []
 
         for i, veh in enumerate(self.casillas_carros):
             nombre = f"C{i+1}"
-            if veh is None:
+            if veh is not None:
                 casillas_carros.append({
                     "nombre": nombre,
-                    "estado": "LIBRE",
-                    "placa": None,
+                    "estado": "OCUPADA",
+                    "placa": veh.placa,
+                    "dueno": veh.dueno
+                })
+                continue
+
+            reserva = self._reserva_que_bloquea(self.agendas_carros, i, ahora)
+            if reserva is not None:
+                casillas_carros.append({
+                    "nombre": nombre,
+                    "estado": "RESERVADA",
+                    "placa": reserva.placa,
                     "dueno": None
                 })
             else:
                 casillas_carros.append({
+                    "nombre": nombre,
+                    "estado": "LIBRE",
+                    "placa": None,
+                    "dueno": None
+                })
+
+        for i, veh in enumerate(self.casillas_motos):
+            nombre = f"M{i+1}"
+            if veh is not None:
+                casillas_motos.append({
                     "nombre": nombre,
                     "estado": "OCUPADA",
                     "placa": veh.placa,
                     "dueno": veh.dueno
                 })
+                continue
 
-        for i, veh in enumerate(self.casillas_motos):
-            nombre = f"M{i+1}"
-            if veh is None:
+            reserva = self._reserva_que_bloquea(self.agendas_motos, i, ahora)
+            if reserva is not None:
                 casillas_motos.append({
                     "nombre": nombre,
-                    "estado": "LIBRE",
-                    "placa": None,
+                    "estado": "RESERVADA",
+                    "placa": reserva.placa,
                     "dueno": None
                 })
             else:
                 casillas_motos.append({
                     "nombre": nombre,
-                    "estado": "OCUPADA",
-                    "placa": veh.placa,
-                    "dueno": veh.dueno
+                    "estado": "LIBRE",
+                    "placa": None,
+                    "dueno": None
                 })
 
         return {"carros": casillas_carros, "motos": casillas_motos}
 
     def obtener_casillas_libres(self):
-        """Retorna las casillas libres."""
+        """Retorna las casillas libres (sin vehículo ni reservas que las bloqueen)."""
+        ahora = time.time()
         libres_carro = []
         libres_moto = []
 
         for i, veh in enumerate(self.casillas_carros):
-            if veh is None:
+            if veh is None and self._reserva_que_bloquea(self.agendas_carros, i, ahora) is None:
                 libres_carro.append(f"C{i+1}")
 
         for i, veh in enumerate(self.casillas_motos):
-            if veh is None:
+            if veh is None and self._reserva_que_bloquea(self.agendas_motos, i, ahora) is None:
                 libres_moto.append(f"M{i+1}")
 
         return {"carros": libres_carro, "motos": libres_moto}
@@ -214,17 +384,20 @@ class Cochera:
         if veh is None:
             return False
 
+        # Copia al escribir: los exports en curso guardan referencias a los
+        # vehículos y deben seguir viendo los datos del momento en que empezaron
+        veh = copy.copy(veh)
         veh.mes_pagado = mes
         veh.anio_pagado = anio
 
         if tipo == "CARRO":
+            self.casillas_carros[indice] = veh
             nombre_casilla = f"C{indice+1}"
         else:
+            self.casillas_motos[indice] = veh
             nombre_casilla = f"M{indice+1}"
 
-        self.historial.append(
-            f"Pago: {veh.tipo} {veh.placa} pagó mes {mes}/{anio} - casilla {nombre_casilla}."
-        )
+        self.historial.registrar("PAGO", veh.tipo, veh.placa, nombre_casilla, mes=mes, anio=anio)
 
         return True
 
@@ -270,10 +443,9 @@ class Cochera:
         else:
             self.casillas_motos[indice] = None
             nombre_casilla = f"M{indice+1}"
+        self._reindexar_casilla(tipo, indice)
 
-        self.historial.append(
-            f"Salida: {veh.tipo} {veh.placa} retirado, se libera casilla {nombre_casilla}."
-        )
+        self.historial.registrar("SALIDA", veh.tipo, veh.placa, nombre_casilla)
 
         return True
 
@@ -282,11 +454,22 @@ class Cochera:
         ocupados_carros = sum(1 for v in self.casillas_carros if v is not None)
         ocupados_motos = sum(1 for v in self.casillas_motos if v is not None)
 
+        # Mismo criterio que registrar_vehiculo: una casilla reservada no está libre
+        ahora = time.time()
+        reservadas_carros = sum(
+            1 for i in self.agendas_carros
+            if self.casillas_carros[i] is None
+            and self._reserva_que_bloquea(self.agendas_carros, i, ahora) is not None)
+        reservadas_motos = sum(
+            1 for i in self.agendas_motos
+            if self.casillas_motos[i] is None
+            and self._reserva_que_bloquea(self.agendas_motos, i, ahora) is not None)
+
         total_carros = len(self.casillas_carros)
         total_motos = len(self.casillas_motos)
 
-        libres_carros = total_carros - ocupados_carros
-        libres_motos = total_motos - ocupados_motos
+        libres_carros = total_carros - ocupados_carros - reservadas_carros
+        libres_motos = total_motos - ocupados_motos - reservadas_motos
 
         # Total recaudado aproximado (suma de tarifas de todos los registrados)
         total_recaudado = 0.0
@@ -300,11 +483,13 @@ class Cochera:
         return {
             "carros": {
                 "ocupadas": ocupados_carros,
+                "reservadas": reservadas_carros,
                 "libres": libres_carros,
                 "total": total_carros
             },
             "motos": {
                 "ocupadas": ocupados_motos,
+                "reservadas": reservadas_motos,
                 "libres": libres_motos,
                 "total": total_motos
             },
@@ -313,7 +498,89 @@ class Cochera:
 
     def obtener_historial(self):
         """Retorna el historial de movimientos."""
-        return self.historial
+        return list(self.historial)
+
+    def obtener_historial_de_placa(self, placa, desde=None, hasta=None, offset=0, limite=50):
+        """Retorna (total, eventos) de una placa en [desde, hasta) (timestamps)."""
+        return self.historial.de_placa(placa, desde, hasta, offset, limite)
+
+    def obtener_historial_de_casilla(self, casilla, desde=None, hasta=None, offset=0, limite=50):
+        """Retorna (total, eventos) de una casilla en [desde, hasta) (timestamps)."""
+        return self.historial.de_casilla(casilla, desde, hasta, offset, limite)
+
+    # -------------------------------
+    #  RESERVAS
+    # -------------------------------
+    def buscar_casilla_disponible(self, tipo, inicio, fin):
+        """Retorna el nombre de una casilla libre de inicio a fin (timestamps) o None."""
+        indice = self._buscar_casilla_disponible(tipo, inicio, fin)
+        if indice is None:
+            return None
+        return f"{tipo[0]}{indice + 1}"
+
+    def crear_reserva(self, tipo, placa, inicio, fin):
+        """
+        Reserva la primera casilla disponible de inicio a fin (timestamps).
+        Retorna la reserva creada o None si el intervalo es inválido, la placa ya
+        tiene una reserva que se cruza con él o no hay casillas.
+        """
+        if tipo not in ["CARRO", "MOTO"] or fin <= inicio:
+            return None
+        if self._reserva_de_placa_que_se_cruza(placa, inicio, fin) is not None:
+            return None
+
+        indice = self._buscar_casilla_disponible(tipo, inicio, fin)
+        if indice is None:
+            return None
+
+        _, agendas = self._casillas_y_agendas(tipo)
+        agenda = agendas.get(indice)
+        if agenda is not None:
+            # Aprovechar para descartar las reservas que ya terminaron
+            for vencida in agenda.purgar(time.time()):
+                self._olvidar_reserva(vencida)
+
+        reserva = Reserva(self.siguiente_reserva, tipo, indice + 1, placa.upper(), inicio, fin)
+        self.siguiente_reserva += 1
+        self._agregar_reserva(reserva)
+
+        self.historial.registrar("RESERVA", tipo, reserva.placa, f"{tipo[0]}{indice + 1}",
+                                 reserva=reserva.id)
+
+        return reserva
+
+    def cancelar_reserva(self, reserva_id):
+        """Cancela una reserva. Retorna True si se canceló, False si no se encontró."""
+        reserva = self.reservas.get(reserva_id)
+        if reserva is None:
+            return False
+
+        self._quitar_reserva(reserva)
+        self.historial.registrar(
+            "CANCELACION", reserva.casilla_tipo, reserva.placa,
+            f"{reserva.casilla_tipo[0]}{reserva.casilla_numero}", reserva=reserva.id
+        )
+
+        return True
+
+    def obtener_reservas(self):
+        """Retorna todas las reservas ordenadas por inicio."""
+        reservas = sorted(self.reservas.values(), key=lambda r: r.inicio)
+        return [reserva.to_dict() for reserva in reservas]
+
+    # -------------------------------
+    #  SNAPSHOTS BINARIOS
+    # -------------------------------
+    def to_snapshot(self, ruta, comprimir=True):
+        """Guarda el estado completo de la cochera en un snapshot binario."""
+        from app.snapshot import escribir_snapshot
+        return escribir_snapshot(self, ruta, comprimir=comprimir)
+
+    @classmethod
+    def from_snapshot(cls, ruta):
+        """Crea una cochera a partir de un snapshot binario."""
+        from app.snapshot import leer_snapshot
+        return leer_snapshot(ruta, cls)
 
     # -------------------------------
     #  MÉTODOS AUXILIARES PARA ORDENAMIENTO Y BÚSQUEDA
@@ -0,0 +1,208 @@
+# ==========================================
+#  RESERVAS DE CASILLAS
+#  Agenda ordenada por casilla + árbol de intervalos de huecos libres
+# ==========================================
+#
+#  Las reservas de una misma casilla nunca se solapan, así que ordenadas por
+#  inicio también quedan ordenadas por fin (AgendaCasilla, con bisect).
+#  Entre reserva y reserva quedan huecos libres; los huecos de todas las
+#  casillas de un tipo se indexan en un árbol de intervalos (IndiceHuecos),
+#  que responde "¿qué casilla está libre de t1 a t2?" en tiempo logarítmico
+#  sin recorrer las casillas ni las reservas.
+#  Los tiempos son timestamps (segundos desde epoch).
+
+import random
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+
+class Reserva:
+    """Reserva de una casilla para una placa en un intervalo [inicio, fin)."""
+
+    __slots__ = ("id", "casilla_tipo", "casilla_numero", "placa", "inicio", "fin")
+
+    def __init__(self, id, casilla_tipo, casilla_numero, placa, inicio, fin):
+        self.id = id
+        self.casilla_tipo = casilla_tipo      # "CARRO" o "MOTO"
+        self.casilla_numero = casilla_numero  # índice humano (1..n)
+        self.placa = placa
+        self.inicio = inicio
+        self.fin = fin
+
+    def to_dict(self):
+        """Convierte la reserva a diccionario para respuesta JSON."""
+        return {
+            "id": self.id,
+            "casilla_tipo": self.casilla_tipo,
+            "casilla_numero": self.casilla_numero,
+            "nombre_casilla": f"{self.casilla_tipo[0]}{self.casilla_numero}",
+            "placa": self.placa,
+            "inicio": datetime.fromtimestamp(self.inicio).isoformat(),
+            "fin": datetime.fromtimestamp(self.fin).isoformat()
+        }
+
+
+class AgendaCasilla:
+    """Reservas de una casilla ordenadas por inicio (sin solaparse)."""
+
+    __slots__ = ("inicios", "fines", "reservas")
+
+    def __init__(self):
+        self.inicios = []
+        self.fines = []
+        self.reservas = []
+
+    def __len__(self):
+        return len(self.reservas)
+
+    def agregar(self, reserva):
+        """Inserta la reserva en su lugar. Debe haberse verificado que está libre."""
+        i = bisect_left(self.inicios, reserva.inicio)
+        self.inicios.insert(i, reserva.inicio)
+        self.fines.insert(i, reserva.fin)
+        self.reservas.insert(i, reserva)
+
+    def quitar(self, reserva):
+        """Quita la reserva de la agenda."""
+        i = bisect_left(self.inicios, reserva.inicio)
+        del self.inicios[i]
+        del self.fines[i]
+        del self.reservas[i]
+
+    def purgar(self, ahora):
+        """Quita las reservas ya terminadas y las retorna."""
+        i = bisect_right(self.fines, ahora)
+        if i == 0:
+            return []
+        vencidas = self.reservas[:i]
+        del self.inicios[:i]
+        del self.fines[:i]
+        del self.reservas[:i]
+        return vencidas
+
+    def huecos(self):
+        """Retorna los intervalos libres [inicio, fin) entre reservas."""
+        huecos = []
+        anterior = float("-inf")
+        for inicio, fin in zip(self.inicios, self.fines):
+            if inicio > anterior:
+                huecos.append((anterior, inicio))
+            anterior = fin
+        huecos.append((anterior, float("inf")))
+        return huecos
+
+
+# -------------------------------
+#  ÍNDICE DE HUECOS (TREAP)
+# -------------------------------
+class _Nodo:
+    __slots__ = ("inicio", "casilla", "fin", "prioridad", "izq", "der", "max_fin")
+
+    def __init__(self, inicio, casilla, fin):
+        self.inicio = inicio
+        self.casilla = casilla
+        self.fin = fin
+        self.prioridad = random.random()
+        self.izq = None
+        self.der = None
+        self.max_fin = fin
+
+
+def _actualizar(nodo):
+    maximo = nodo.fin
+    if nodo.izq is not None and nodo.izq.max_fin > maximo:
+        maximo = nodo.izq.max_fin
+    if nodo.der is not None and nodo.der.max_fin > maximo:
+        maximo = nodo.der.max_fin
+    nodo.max_fin = maximo
+
+
+def _dividir(nodo, clave):
+    """Separa el árbol en (claves < clave, claves >= clave)."""
+    if nodo is None:
+        return None, None
+    if (nodo.inicio, nodo.casilla) < clave:
+        nodo.der, derecha = _dividir(nodo.der, clave)
+        _actualizar(nodo)
+        return nodo, derecha
+    izquierda, nodo.izq = _dividir(nodo.izq, clave)
+    _actualizar(nodo)
+    return izquierda, nodo
+
+
+def _unir(izquierda, derecha):
+    """Une dos árboles donde todas las claves de la izquierda son menores."""
+    if izquierda is None:
+        return derecha
+    if derecha is None:
+        return izquierda
+    if izquierda.prioridad > derecha.prioridad:
+        izquierda.der = _unir(izquierda.der, derecha)
+        _actualizar(izquierda)
+        return izquierda
+    derecha.izq = _unir(izquierda, derecha.izq)
+    _actualizar(derecha)
+    return derecha
+
+
+class IndiceHuecos:
+    """
+    Árbol de intervalos con los huecos libres de todas las casillas de un tipo.
+    Es un treap ordenado por inicio del hueco donde cada nodo guarda además el
+    mayor fin de su subárbol. Así "¿hay alguna casilla libre de t1 a t2?" se
+    responde bajando una sola rama: O(log n) esperado, sin mirar cada reserva.
+    """
+
+    def __init__(self):
+        self.raiz = None
+        self.huecos_de = {}  # casilla -> lista de huecos (inicio, fin) indexados
+        self._cantidad = 0   # total de huecos indexados
+
+    def __len__(self):
+        return self._cantidad
+
+    def _insertar(self, inicio, casilla, fin):
+        izquierda, derecha = _dividir(self.raiz, (inicio, casilla))
+        self.raiz = _unir(_unir(izquierda, _Nodo(inicio, casilla, fin)), derecha)
+
+    def _eliminar(self, inicio, casilla):
+        izquierda, resto = _dividir(self.raiz, (inicio, casilla))
+        # La clave buscada es la menor del resto: se separa quedándose con el siguiente
+        _, derecha = _dividir(resto, (inicio, casilla + 0.5))
+        self.raiz = _unir(izquierda, derecha)
+
+    def reemplazar(self, casilla, huecos):
+        """Reemplaza los huecos indexados de una casilla (lista vacía = no disponible)."""
+        # Sólo se tocan los huecos que cambiaron: agregar o quitar una reserva
+        # parte o une un hueco y deja el resto igual
+        anteriores = set(self.huecos_de.pop(casilla, []))
+        nuevos = set(huecos)
+        self._cantidad += len(nuevos) - len(anteriores)
+        for inicio, _ in anteriores - nuevos:
+            self._eliminar(inicio, casilla)
+        for inicio, fin in nuevos - anteriores:
+            self._insertar(inicio, casilla, fin)
+        if huecos:
+            self.huecos_de[casilla] = huecos
+
+    def buscar(self, inicio, fin):
+        """Retorna una casilla con un hueco que cubre [inicio, fin) o None."""
+        nodo = self.raiz
+        while nodo is not None and nodo.max_fin >= fin:
+            if nodo.inicio > inicio:
+                nodo = nodo.izq
+                continue
+            # Todo el subárbol izquierdo empieza antes que inicio: basta su max_fin
+            if nodo.izq is not None and nodo.izq.max_fin >= fin:
+                nodo = nodo.izq
+                while True:
+                    if nodo.izq is not None and nodo.izq.max_fin >= fin:
+                        nodo = nodo.izq
+                    elif nodo.fin >= fin:
+                        return nodo.casilla
+                    else:
+                        nodo = nodo.der
+            if nodo.fin >= fin:
+                return nodo.casilla
+            nodo = nodo.der
+        return None
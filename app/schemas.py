@@ -3,9 +3,12 @@
 #  Modelos para validar requests y estructurar responses
 # ==========================================
 
-from pydantic import BaseModel
+from datetime import datetime
+from pydantic import BaseModel, Field
 from typing import Optional, Dict
 
+from app.garajes import MAX_CAPACIDAD
+
 
 class VehiculoRequest(BaseModel):
     """Esquema para registrar un nuevo vehículo."""
@@ -53,7 +56,7 @@ class DeudoresRequest(BaseModel):
 class CasillaEstado(BaseModel):
     """Esquema para el estado de una casilla."""
     nombre: str
-    estado: str  # "LIBRE" o "OCUPADA"
+    estado: str  # "LIBRE", "OCUPADA" o "RESERVADA"
     placa: Optional[str] = None
     dueno: Optional[str] = None
 
@@ -75,4 +78,32 @@ class LoginResponse(BaseModel):
     """Esquema de respuesta para login."""
     message: str
     state: bool
-    user: str
\ No newline at end of file
+    user: str
+    token: str
+    expira: datetime
+
+
+class GarajeRequest(BaseModel):
+    """Esquema para crear un garaje con sus capacidades y tarifas."""
+    id: str
+    capacidad_carros: int = Field(40, ge=0, le=MAX_CAPACIDAD)
+    capacidad_motos: int = Field(10, ge=0, le=MAX_CAPACIDAD)
+    tarifa_carro: float = Field(250.0, ge=0)
+    tarifa_moto: float = Field(150.0, ge=0)
+
+
+class EventoPlacaRequest(BaseModel):
+    """Esquema de una lectura de placa enviada por una cámara."""
+    placa: str
+    evento: str  # "ENTRADA" o "SALIDA"
+    tipo: str = "CARRO"  # "CARRO" o "MOTO"
+    garaje_id: Optional[str] = None
+    camara: Optional[str] = None
+
+
+class ReservaRequest(BaseModel):
+    """Esquema para reservar una casilla en un intervalo de tiempo."""
+    tipo: str  # "CARRO" o "MOTO"
+    placa: str
+    inicio: datetime
+    fin: datetime
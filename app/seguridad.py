@@ -0,0 +1,254 @@
+# ==========================================
+#  SEGURIDAD: TOKENS DE SESIÓN Y LÍMITE DE TASA
+#  Tokens firmados con HMAC + token bucket por cliente
+# ==========================================
+#
+#  Tokens: "<datos>.<firma>" en base64url, donde datos = "usuario|expira" y
+#  firma = HMAC-SHA256(secreto, datos). Verificarlos no consulta ningún
+#  almacenamiento: basta recalcular la firma y compararla en tiempo
+#  constante (hmac.compare_digest), así que sirven con cualquier número de
+#  procesos que compartan el secreto.
+#
+#  Límite de tasa: cada cliente tiene un balde de `rafaga` fichas que se
+#  recarga a `tasa` fichas por segundo; cada request gasta una. Los baldes
+#  se reparten en fragmentos, cada uno con su propio lock, para que las
+#  requests de clientes distintos no compitan por el mismo lock. Un balde
+#  sin uso durante un rato ya estaría lleno, así que se descarta.
+#
+#  Ambos controles corren en un middleware ASGI, antes de que la request
+#  llegue a FastAPI: rechazar a un cliente abusivo no pasa por el ruteo, la
+#  validación ni las dependencias, así que casi no le quita tiempo al resto.
+#  Además la respuesta 429 se demora hasta que el cliente vuelva a tener una
+#  ficha (máx. 1 s): un cliente que reintenta sin pausa queda frenado a su
+#  tasa en vez de ocupar el servidor con miles de rechazos por segundo.
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import math
+import threading
+import time
+import zlib
+
+
+def _b64(datos):
+    return base64.urlsafe_b64encode(datos).rstrip(b"=")
+
+
+def _desde_b64(texto):
+    return base64.urlsafe_b64decode(texto + b"=" * (-len(texto) % 4))
+
+
+class FirmadorTokens:
+    """Emite y verifica tokens de sesión firmados (sin estado en el servidor)."""
+
+    def __init__(self, secreto, duracion=12 * 3600):
+        self.duracion = duracion
+        # El HMAC con la clave ya cargada se copia en cada firma en vez de
+        # rehacer el relleno de la clave
+        self._hmac = hmac.new(secreto, digestmod=hashlib.sha256)
+
+    def _firmar(self, datos):
+        firma = self._hmac.copy()
+        firma.update(datos)
+        return firma.digest()
+
+    def emitir(self, usuario, ahora=None):
+        """Retorna (token, expira) para el usuario; expira es un timestamp."""
+        if ahora is None:
+            ahora = time.time()
+        expira = int(ahora + self.duracion)
+        datos = _b64(f"{usuario}|{expira}".encode("utf-8"))
+        token = datos + b"." + _b64(self._firmar(datos))
+        return token.decode("ascii"), expira
+
+    def verificar(self, token, ahora=None):
+        """Retorna el usuario del token o None si es inválido o está vencido."""
+        try:
+            datos, firma = token.encode("ascii").split(b".")
+            firma = _desde_b64(firma)
+        except ValueError:  # incluye UnicodeEncodeError y base64 inválido
+            return None
+        if not hmac.compare_digest(firma, self._firmar(datos)):
+            return None
+        usuario, _, expira = _desde_b64(datos).decode("utf-8").rpartition("|")
+        if ahora is None:
+            ahora = time.time()
+        if int(expira) <= ahora:
+            return None
+        return usuario
+
+
+class _Fragmento:
+    __slots__ = ("lock", "baldes", "permitidas", "rechazadas", "descartados")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # cliente -> [fichas, último uso]. Cada uso lo reinserta al final, así
+        # los baldes inactivos quedan siempre al principio.
+        self.baldes = {}
+        # Contadores por fragmento: se actualizan bajo su propio lock
+        self.permitidas = 0
+        self.rechazadas = 0
+        self.descartados = 0
+
+
+class LimitadorTasa:
+    """Token bucket por cliente con baldes en memoria repartidos en fragmentos."""
+
+    def __init__(self, tasa, rafaga, n_fragmentos=16, inactividad=60.0):
+        self.tasa = tasa
+        self.rafaga = rafaga
+        # Nunca se descarta un balde antes de que se haya recargado por completo:
+        # descartarlo equivale a darle todas sus fichas
+        self.inactividad = max(inactividad, rafaga / tasa)
+        self._fragmentos = [_Fragmento() for _ in range(n_fragmentos)]
+
+    def _descartar_inactivos(self, fragmento, ahora):
+        limite = ahora - self.inactividad
+        baldes = fragmento.baldes
+        while baldes:
+            cliente = next(iter(baldes))
+            if baldes[cliente][1] >= limite:
+                break
+            del baldes[cliente]
+            fragmento.descartados += 1
+
+    def permitir(self, cliente, ahora=None):
+        """
+        Gasta una ficha del cliente. Retorna 0.0 si la request está permitida o
+        los segundos que debe esperar hasta tener una ficha.
+        """
+        if ahora is None:
+            ahora = time.monotonic()
+        # crc32 y no hash(): el reparto no depende de PYTHONHASHSEED
+        fragmento = self._fragmentos[zlib.crc32(cliente.encode()) % len(self._fragmentos)]
+        with fragmento.lock:
+            baldes = fragmento.baldes
+            balde = baldes.pop(cliente, None)
+            if balde is None:
+                balde = [self.rafaga, ahora]
+                self._descartar_inactivos(fragmento, ahora)
+            baldes[cliente] = balde
+
+            fichas = min(self.rafaga, balde[0] + (ahora - balde[1]) * self.tasa)
+            balde[1] = ahora
+            if fichas >= 1:
+                balde[0] = fichas - 1
+                fragmento.permitidas += 1
+                return 0.0
+            balde[0] = fichas
+            fragmento.rechazadas += 1
+            return (1 - fichas) / self.tasa
+
+    def metricas(self):
+        """Retorna la configuración y contadores del limitador."""
+        totales = {"clientes": 0, "permitidas": 0, "rechazadas": 0, "descartados": 0}
+        for fragmento in self._fragmentos:
+            with fragmento.lock:
+                totales["clientes"] += len(fragmento.baldes)
+                totales["permitidas"] += fragmento.permitidas
+                totales["rechazadas"] += fragmento.rechazadas
+                totales["descartados"] += fragmento.descartados
+        return {"tasa": self.tasa, "rafaga": self.rafaga,
+                "fragmentos": len(self._fragmentos), **totales}
+
+
+# -------------------------------
+#  MIDDLEWARE ASGI
+# -------------------------------
+async def _responder(send, status, detalle, cabeceras=()):
+    """Envía una respuesta JSON con el mismo formato que HTTPException."""
+    cuerpo = json.dumps({"detail": detalle}).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"),
+                    (b"content-length", str(len(cuerpo)).encode("ascii")), *cabeceras]
+    })
+    await send({"type": "http.response.body", "body": cuerpo})
+
+
+class MiddlewareAcceso:
+    """
+    Verifica el token de sesión ("Authorization: Bearer <token>") si viene y lo
+    exige en las rutas protegidas (todas salvo las públicas con exigir_token;
+    siempre las de `prefijos_con_token` y los pares (método, ruta) de
+    `rutas_con_token`). Después gasta una ficha de la IP del cliente.
+
+    Las rutas públicas ignoran un token inválido (la request sigue como
+    anónima) y las rutas sin límite sólo se saltean el limitador, no el token.
+    Detrás de `proxies` proxies de confianza la IP del cliente se toma de
+    X-Forwarded-For, contando desde la derecha.
+    """
+
+    def __init__(self, app, firmador, limitador=None, exigir_token=False,
+                 rutas_publicas=(), rutas_sin_limite=(), demora_maxima=1.0, proxies=0,
+                 prefijos_con_token=(), rutas_con_token=()):
+        self.app = app
+        self.demora_maxima = demora_maxima
+        self.firmador = firmador
+        self.limitador = limitador
+        self.exigir_token = exigir_token
+        self.rutas_publicas = set(rutas_publicas)
+        self.rutas_sin_limite = set(rutas_sin_limite)
+        self.proxies = proxies
+        self.prefijos_con_token = tuple(prefijos_con_token)
+        self.rutas_con_token = set(rutas_con_token)
+
+    def _exige_token(self, metodo, ruta):
+        if self.exigir_token:
+            return True
+        return ruta.startswith(self.prefijos_con_token) or (metodo, ruta) in self.rutas_con_token
+
+    def _ip_cliente(self, scope, reenviado):
+        """IP que anotó el proxy de confianza más lejano, o la de la conexión."""
+        if self.proxies and reenviado:
+            # Cada proxy agrega a la derecha la IP de quien le habló; las
+            # entradas de más a la izquierda las puede inventar el cliente
+            saltos = [salto.strip() for salto in ",".join(reenviado).split(",")]
+            return saltos[-min(self.proxies, len(saltos))]
+        return scope["client"][0] if scope.get("client") else "desconocida"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        ruta = scope["path"]
+        publica = ruta in self.rutas_publicas
+
+        autorizacion = None
+        reenviado = []
+        for nombre, valor in scope["headers"]:
+            if nombre == b"authorization":
+                autorizacion = valor.decode("latin-1")
+            elif nombre == b"x-forwarded-for":
+                reenviado.append(valor.decode("latin-1"))
+
+        usuario = None
+        if autorizacion:
+            esquema, _, token = autorizacion.partition(" ")
+            if esquema.lower() == "bearer":
+                usuario = self.firmador.verificar(token)
+            # En una ruta pública (p. ej. /login con un token vencido) se sigue sin usuario
+            if usuario is None and not publica:
+                await _responder(send, 401, "Token inválido o vencido",
+                                 [(b"www-authenticate", b"Bearer")])
+                return
+        elif not publica and self._exige_token(scope["method"], ruta):
+            await _responder(send, 401, "Se requiere un token de sesión (POST /login)",
+                             [(b"www-authenticate", b"Bearer")])
+            return
+
+        if self.limitador is not None and ruta not in self.rutas_sin_limite:
+            # Sólo la IP: con y sin token el mismo cliente gasta del mismo balde
+            espera = self.limitador.permitir(self._ip_cliente(scope, reenviado))
+            if espera:
+                await asyncio.sleep(min(espera, self.demora_maxima))
+                await _responder(send, 429, "Demasiadas requests, intente más tarde",
+                                 [(b"retry-after", str(math.ceil(espera)).encode("ascii"))])
+                return
+
+        await self.app(scope, receive, send)
@@ -0,0 +1,442 @@
+# ==========================================
+#  SNAPSHOTS BINARIOS DE LA COCHERA
+#  Formato compacto y versionado para respaldos y migraciones
+# ==========================================
+#
+#  Estructura del archivo (todo en little-endian):
+#
+#    Cabecera ........ "APKS" | versión (u16) | flags (u16) | n_secciones (u32)
+#    Tabla ........... por sección: nombre (16 bytes) | offset (u64)
+#                      | longitud guardada (u64) | longitud original (u64)
+#    Datos ........... secciones alineadas a 8 bytes
+#
+#  Cada sección es una columna con longitud prefijada en la tabla, así el
+#  lector puede saltar directo a la que necesita sin leer las demás. Los
+#  textos (placas, dueños, historial...) se guardan una sola vez en una
+#  tabla de cadenas internadas y las columnas sólo guardan su índice.
+#  Si el flag de compresión está activo cada sección va comprimida con zlib
+#  por separado.
+
+import gc
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+from itertools import accumulate
+
+from app.historial import Historial
+from app.models import Vehiculo
+from app.reservas import Reserva
+
+MAGIA = b"APKS"
+VERSION = 2  # v2: historial con campos estructurados (v1 lo guardaba como textos)
+FLAG_ZLIB = 0x1
+NIVEL_COMPRESION = 1  # prioriza velocidad; los datos repetitivos comprimen bien igual
+
+_CABECERA = struct.Struct("<4sHHI")
+_ENTRADA = struct.Struct("<16sQQQ")
+_ALINEACION = 8
+_LITTLE = sys.byteorder == "little"
+
+# Atributos de texto del vehículo; cada uno se guarda en la sección "v_<campo>"
+_COLUMNAS_TEXTO = ("placa", "dueno", "dni", "telefono", "marca", "modelo")
+_TIPOS = ("CARRO", "MOTO")
+# Columnas del historial en v2 (sección, typecode), en el orden de Historial.desde_columnas
+_COLUMNAS_HISTORIAL = (("h_tiempo", "d"), ("h_evento", "B"), ("h_tipo", "B"), ("h_placa", "I"),
+                       ("h_casilla", "I"), ("h_mes", "b"), ("h_anio", "h"), ("h_reserva", "q"))
+
+
+class SnapshotError(Exception):
+    """Error al leer un snapshot inválido o de versión no soportada."""
+
+
+# -------------------------------
+#  ESCRITURA
+# -------------------------------
+class _TablaCadenas:
+    """Interna cadenas: cada texto distinto se guarda una sola vez."""
+
+    def __init__(self):
+        # El dict conserva el orden de inserción: su orden es el de los índices
+        self.indices = {}
+
+    def ids(self, textos):
+        """Retorna la columna de índices para una secuencia de textos."""
+        indices = self.indices
+        return array("I", [indices.setdefault(texto, len(indices)) for texto in textos])
+
+    def serializar(self):
+        """Retorna (offsets, blob). Los offsets son en caracteres, no bytes."""
+        cadenas = list(self.indices)
+        offsets = array("Q", accumulate(map(len, cadenas), initial=0))
+        return _a_bytes(offsets), "".join(cadenas).encode("utf-8")
+
+
+def _a_bytes(columna):
+    if not _LITTLE:
+        columna = array(columna.typecode, columna)
+        columna.byteswap()
+    return columna.tobytes()
+
+
+def _columnas_cochera(cochera):
+    """Convierte el estado de la cochera en secciones (nombre -> bytes)."""
+    carros = [veh for veh in cochera.casillas_carros if veh is not None]
+    motos = [veh for veh in cochera.casillas_motos if veh is not None]
+    vehiculos = carros + motos
+
+    cadenas = _TablaCadenas()
+    historial = cochera.historial
+    # Se lee una sola vez: si se registra un evento mientras se guarda, todas
+    # las columnas se cortan en el mismo largo
+    n = len(historial)
+    codigos = {tipo: codigo for codigo, tipo in enumerate(_TIPOS)}
+
+    meta = {
+        "capacidad_carros": len(cochera.casillas_carros),
+        "capacidad_motos": len(cochera.casillas_motos),
+        "tarifa_carro": cochera.tarifa_carro,
+        "tarifa_moto": cochera.tarifa_moto,
+        "vehiculos": len(vehiculos),
+        "eventos": n,
+        "reservas": len(cochera.reservas),
+        "siguiente_reserva": cochera.siguiente_reserva,
+    }
+
+    secciones = {
+        "meta": json.dumps(meta).encode("utf-8"),
+        "v_casilla": bytes(len(carros)) + b"\1" * len(motos),
+        "v_numero": _a_bytes(array("I", [veh.casilla_numero for veh in vehiculos])),
+        "v_tipo": bytes([codigos[veh.tipo] for veh in vehiculos]),
+        "v_mes": _a_bytes(array("i", [veh.mes_pagado for veh in vehiculos])),
+        "v_anio": _a_bytes(array("i", [veh.anio_pagado for veh in vehiculos])),
+        "v_tarifa": _a_bytes(array("d", [veh.tarifa_mensual for veh in vehiculos])),
+        "h_tiempo": _a_bytes(historial.tiempos[:n]),
+        "h_evento": _a_bytes(historial.eventos[:n]),
+        "h_tipo": _a_bytes(historial.tipos[:n]),
+        "h_placa": _a_bytes(cadenas.ids(historial.placas[:n])),
+        "h_casilla": _a_bytes(cadenas.ids(historial.casillas[:n])),
+        "h_mes": _a_bytes(historial.meses[:n]),
+        "h_anio": _a_bytes(historial.anios[:n]),
+        "h_reserva": _a_bytes(historial.reservas[:n]),
+    }
+    for campo in _COLUMNAS_TEXTO:
+        secciones[f"v_{campo}"] = _a_bytes(cadenas.ids([getattr(veh, campo) for veh in vehiculos]))
+
+    reservas = list(cochera.reservas.values())
+    secciones.update({
+        "r_id": _a_bytes(array("Q", [r.id for r in reservas])),
+        "r_casilla": bytes([codigos[r.casilla_tipo] for r in reservas]),
+        "r_numero": _a_bytes(array("I", [r.casilla_numero for r in reservas])),
+        "r_placa": _a_bytes(cadenas.ids([r.placa for r in reservas])),
+        "r_inicio": _a_bytes(array("d", [r.inicio for r in reservas])),
+        "r_fin": _a_bytes(array("d", [r.fin for r in reservas])),
+    })
+
+    secciones["cadenas_idx"], secciones["cadenas"] = cadenas.serializar()
+    return secciones
+
+
+def escribir_snapshot(cochera, ruta, comprimir=True):
+    """
+    Escribe el snapshot de la cochera en la ruta indicada.
+    Se escribe primero a un archivo temporal y luego se reemplaza, para que un
+    corte a mitad de camino no deje un snapshot corrupto.
+    Retorna el tamaño final del archivo en bytes.
+    """
+    secciones = _columnas_cochera(cochera)
+    flags = FLAG_ZLIB if comprimir else 0
+
+    inicio_datos = _CABECERA.size + _ENTRADA.size * len(secciones)
+    tabla = []
+    cuerpos = []
+    offset = inicio_datos
+    for nombre, datos in secciones.items():
+        guardado = zlib.compress(datos, NIVEL_COMPRESION) if comprimir else datos
+        relleno = (-offset) % _ALINEACION
+        offset += relleno
+        tabla.append(_ENTRADA.pack(nombre.encode("ascii"), offset, len(guardado), len(datos)))
+        cuerpos.append((relleno, guardado))
+        offset += len(guardado)
+
+    # Un temporal único por escritura: dos snapshots simultáneos a la misma
+    # ruta no se pisan y el que reemplaza último siempre está completo
+    descriptor, temporal = tempfile.mkstemp(
+        dir=os.path.dirname(ruta) or ".", prefix=os.path.basename(ruta) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as archivo:
+            archivo.write(_CABECERA.pack(MAGIA, VERSION, flags, len(secciones)))
+            for entrada in tabla:
+                archivo.write(entrada)
+            for relleno, guardado in cuerpos:
+                archivo.write(b"\0" * relleno)
+                archivo.write(guardado)
+        os.replace(temporal, ruta)
+    except BaseException:
+        os.unlink(temporal)
+        raise
+    return offset
+
+
+# -------------------------------
+#  LECTURA
+# -------------------------------
+class Snapshot:
+    """
+    Lector perezoso de snapshots.
+    Mapea el archivo en memoria y sólo decodifica una columna cuando se pide.
+    Sin compresión las columnas numéricas son vistas directas sobre el mmap
+    (sin copiar); deben dejar de usarse antes de cerrar el snapshot.
+    """
+
+    def __init__(self, ruta):
+        self._archivo = open(ruta, "rb")
+        try:
+            self._mapa = mmap.mmap(self._archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # mmap no acepta archivos vacíos
+            self._archivo.close()
+            raise SnapshotError("Snapshot vacío")
+        self._vista = memoryview(self._mapa)
+        self._cache = {}
+        self._cadenas = None
+        try:
+            self._leer_cabecera()
+        except Exception:
+            self.close()
+            raise
+
+    def _leer_cabecera(self):
+        if len(self._vista) < _CABECERA.size:
+            raise SnapshotError("Snapshot truncado")
+        magia, version, flags, n_secciones = _CABECERA.unpack_from(self._vista, 0)
+        if magia != MAGIA:
+            raise SnapshotError("El archivo no es un snapshot de cochera")
+        if version > VERSION:
+            raise SnapshotError(f"Versión de snapshot no soportada: {version}")
+        self.version = version
+        self.comprimido = bool(flags & FLAG_ZLIB)
+
+        self._secciones = {}
+        posicion = _CABECERA.size
+        if posicion + _ENTRADA.size * n_secciones > len(self._vista):
+            raise SnapshotError("Snapshot truncado")
+        for _ in range(n_secciones):
+            nombre, offset, guardado, original = _ENTRADA.unpack_from(self._vista, posicion)
+            if offset + guardado > len(self._vista):
+                raise SnapshotError("Snapshot truncado")
+            self._secciones[nombre.rstrip(b"\0").decode("ascii")] = (offset, guardado, original)
+            posicion += _ENTRADA.size
+
+        try:
+            self.meta = json.loads(bytes(self._bytes("meta")))
+        except ValueError as error:  # JSON o UTF-8 inválido
+            raise SnapshotError(f"Sección 'meta' inválida: {error}") from None
+        if not isinstance(self.meta, dict):
+            raise SnapshotError("Sección 'meta' inválida")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """
+        Libera el mmap y el archivo. No lanza excepciones: si alguien todavía
+        tiene una vista sobre el mmap (p. ej. el traceback de un error al
+        decodificar), el mmap se cierra solo cuando esa vista se libera.
+        """
+        self._cache.clear()
+        self._cadenas = None
+        try:
+            self._vista.release()
+            self._mapa.close()
+        except BufferError:
+            pass
+        self._archivo.close()
+
+    def secciones(self):
+        """Retorna los nombres de las secciones presentes."""
+        return list(self._secciones)
+
+    def _bytes(self, nombre):
+        if nombre not in self._secciones:
+            raise SnapshotError(f"Sección '{nombre}' no encontrada")
+        offset, guardado, _ = self._secciones[nombre]
+        datos = self._vista[offset:offset + guardado]
+        if self.comprimido:
+            try:
+                return zlib.decompress(datos)
+            except zlib.error as error:
+                raise SnapshotError(f"Sección '{nombre}' corrupta: {error}") from None
+        return datos
+
+    def columna(self, nombre, typecode):
+        """Retorna la columna como secuencia de números (se decodifica una vez)."""
+        if nombre in self._cache:
+            return self._cache[nombre]
+        datos = self._bytes(nombre)
+        if _LITTLE and not self.comprimido:
+            valores = datos.cast(typecode)
+        else:
+            valores = array(typecode)
+            valores.frombytes(datos)
+            if not _LITTLE:
+                valores.byteswap()
+        self._cache[nombre] = valores
+        return valores
+
+    def cadenas(self):
+        """Retorna la tabla de cadenas internadas como lista."""
+        if self._cadenas is None:
+            offsets = self.columna("cadenas_idx", "Q")
+            texto = bytes(self._bytes("cadenas")).decode("utf-8")
+            self._cadenas = [texto[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+        return self._cadenas
+
+    def historial(self):
+        """Retorna el historial con sus índices por placa y casilla."""
+        cadenas = self.cadenas()
+        v1 = "h_tiempo" not in self._secciones  # v1: el historial eran textos
+        columnas = [self.columna(nombre, typecode) for nombre, typecode in
+                    ((("historial", "I"),) if v1 else _COLUMNAS_HISTORIAL)]
+        # Columnas de distinto largo harían fallar las consultas con IndexError
+        for columna in columnas:
+            if len(columna) != self.meta["eventos"]:
+                raise SnapshotError(f"Historial inconsistente: {len(columna)} valores "
+                                    f"para {self.meta['eventos']} eventos")
+
+        if v1:
+            return _historial_desde_textos([cadenas[i] for i in columnas[0]])
+        tiempos, eventos, tipos, placas, casillas, meses, anios, reservas = columnas
+        return Historial.desde_columnas(
+            tiempos, eventos, tipos,
+            [cadenas[i] for i in placas],
+            [cadenas[i] for i in casillas],
+            meses, anios, reservas,
+        )
+
+    def vehiculos(self):
+        """Genera los vehículos del snapshot uno por uno."""
+        cadenas = self.cadenas()
+        textos = [[cadenas[i] for i in self.columna(f"v_{campo}", "I")]
+                  for campo in _COLUMNAS_TEXTO]
+        tipos = [_TIPOS[codigo] for codigo in self.columna("v_tipo", "B")]
+        casillas = [_TIPOS[codigo] for codigo in self.columna("v_casilla", "B")]
+        filas = zip(
+            tipos, *textos, casillas,
+            self.columna("v_numero", "I").tolist(),
+            self.columna("v_mes", "i").tolist(),
+            self.columna("v_anio", "i").tolist(),
+            self.columna("v_tarifa", "d").tolist(),
+        )
+        for fila in filas:
+            yield Vehiculo(*fila)
+
+    def reservas(self):
+        """Genera las reservas del snapshot (los anteriores a las reservas no tienen)."""
+        if "r_id" not in self._secciones:
+            return
+        cadenas = self.cadenas()
+        filas = zip(
+            self.columna("r_id", "Q").tolist(),
+            [_TIPOS[codigo] for codigo in self.columna("r_casilla", "B")],
+            self.columna("r_numero", "I").tolist(),
+            [cadenas[i] for i in self.columna("r_placa", "I")],
+            self.columna("r_inicio", "d").tolist(),
+            self.columna("r_fin", "d").tolist(),
+        )
+        for fila in filas:
+            yield Reserva(*fila)
+
+
+# Formatos de texto del historial en snapshots v1
+_TEXTOS_V1 = [
+    ("REGISTRO", re.compile(r"Registro: (CARRO|MOTO) (.+?) asignado a casilla (\S+)\.$")),
+    ("PAGO", re.compile(r"Pago: (CARRO|MOTO) (.+?) pagó mes (\d+)/(\d+) - casilla (\S+)\.$")),
+    ("SALIDA", re.compile(r"Salida: (CARRO|MOTO) (.+?) retirado, se libera casilla (\S+)\.$")),
+    ("RESERVA", re.compile(r"Reserva: (CARRO|MOTO) (.+?) reserva casilla (\S+) \(reserva #(\d+)\)\.$")),
+    ("CANCELACION", re.compile(
+        r"Cancelación: (CARRO|MOTO) (.+?) libera reserva de casilla (\S+) \(reserva #(\d+)\)\.$")),
+]
+
+
+def _historial_desde_textos(textos):
+    """Convierte el historial en texto de un snapshot v1 (sin fechas) en eventos."""
+    historial = Historial()
+    for texto in textos:
+        for evento, patron in _TEXTOS_V1:
+            encontrado = patron.match(texto)
+            if encontrado:
+                break
+        else:
+            raise SnapshotError(f"Evento de historial no reconocido: {texto!r}")
+        campos = encontrado.groups()
+        if evento == "PAGO":
+            tipo, placa, mes, anio, casilla = campos
+            historial.registrar(evento, tipo, placa, casilla, mes=int(mes), anio=int(anio), tiempo=0.0)
+        elif evento in ("RESERVA", "CANCELACION"):
+            tipo, placa, casilla, reserva = campos
+            historial.registrar(evento, tipo, placa, casilla, reserva=int(reserva), tiempo=0.0)
+        else:
+            tipo, placa, casilla = campos
+            historial.registrar(evento, tipo, placa, casilla, tiempo=0.0)
+    return historial
+
+
+def leer_snapshot(ruta, clase_cochera):
+    """Reconstruye una cochera completa a partir de un snapshot."""
+    # Crear millones de objetos dispara el recolector de ciclos una y otra vez
+    # sin que haya nada que recolectar; se pausa mientras dura la carga.
+    gc_activo = gc.isenabled()
+    gc.disable()
+    try:
+        return _construir_cochera(ruta, clase_cochera)
+    finally:
+        if gc_activo:
+            gc.enable()
+
+
+def _construir_cochera(ruta, clase_cochera):
+    try:
+        with Snapshot(ruta) as snap:
+            return _cochera_desde(snap, clase_cochera)
+    except SnapshotError:
+        raise
+    except (KeyError, IndexError, TypeError, ValueError, OverflowError) as error:
+        # Datos que decodifican pero no tienen sentido (p. ej. una clave que
+        # falta en meta o una columna de otro largo): el archivo está corrupto
+        raise SnapshotError(f"Snapshot corrupto: {error!r}") from error
+
+
+def _casilla_valida(casillas, casilla_tipo, casilla_numero):
+    if not 1 <= casilla_numero <= len(casillas):
+        raise SnapshotError(
+            f"Casilla fuera de rango: {casilla_tipo} {casilla_numero} (capacidad {len(casillas)})")
+    return casilla_numero - 1
+
+
+def _cochera_desde(snap, clase_cochera):
+    meta = snap.meta
+    cochera = clase_cochera(
+        capacidad_carros=meta["capacidad_carros"],
+        capacidad_motos=meta["capacidad_motos"],
+        tarifa_carro=meta["tarifa_carro"],
+        tarifa_moto=meta["tarifa_moto"],
+    )
+    for veh in snap.vehiculos():
+        casillas, _ = cochera._casillas_y_agendas(veh.casilla_tipo)  # noqa: SLF001
+        casillas[_casilla_valida(casillas, veh.casilla_tipo, veh.casilla_numero)] = veh
+    cochera.historial = snap.historial()
+    for reserva in snap.reservas():
+        casillas, _ = cochera._casillas_y_agendas(reserva.casilla_tipo)  # noqa: SLF001
+        _casilla_valida(casillas, reserva.casilla_tipo, reserva.casilla_numero)
+        cochera._agregar_reserva(reserva)  # noqa: SLF001
+    cochera.siguiente_reserva = meta.get("siguiente_reserva", 1)
+    return cochera
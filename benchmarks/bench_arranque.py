@@ -0,0 +1,102 @@
+# ==========================================
+#  BENCHMARK: ARRANQUE EN FRÍO
+#  Tiempo hasta la primera respuesta exitosa, modo normal vs rápido
+#
+#  Uso: python -m benchmarks.bench_arranque [n_vehiculos] [repeticiones]
+#
+#  Levanta el servidor como en render.yaml (uvicorn main:app) con un
+#  snapshot guardado de n_vehiculos y mide desde que se lanza el proceso.
+# ==========================================
+
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_snapshot import poblar
+
+ESPERA_MAXIMA = 120.0
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def pedir(puerto, ruta):
+    """Hace un GET y retorna (status, cuerpo) o (None, None) si no hay conexión."""
+    conexion = http.client.HTTPConnection("127.0.0.1", puerto, timeout=ESPERA_MAXIMA)
+    try:
+        conexion.request("GET", ruta)
+        respuesta = conexion.getresponse()
+        return respuesta.status, respuesta.read()
+    except OSError:
+        return None, None
+    finally:
+        conexion.close()
+
+
+def esperar_200(puerto, ruta, inicio):
+    """Reintenta la ruta hasta recibir 200; retorna (segundos desde inicio, cuerpo)."""
+    while time.perf_counter() - inicio < ESPERA_MAXIMA:
+        status, cuerpo = pedir(puerto, ruta)
+        if status == 200:
+            return time.perf_counter() - inicio, cuerpo
+        time.sleep(0.002)
+    raise TimeoutError(f"{ruta} no respondió 200 en {ESPERA_MAXIMA} s")
+
+
+def arrancar(modo, carpeta, ruta_snapshot):
+    puerto = puerto_libre()
+    entorno = dict(os.environ, APPARKALA_ARRANQUE=modo, APPARKALA_SNAPSHOT=ruta_snapshot,
+                   APPARKALA_GARAJES=os.path.join(carpeta, "garajes"))
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(puerto),
+         "--log-level", "warning"],
+        env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        vivo, _ = esperar_200(puerto, "/healthz", inicio)
+        listo, cuerpo = esperar_200(puerto, "/readyz", inicio)
+        resumen, _ = esperar_200(puerto, "/resumen", inicio)
+    finally:
+        proceso.terminate()
+        proceso.wait()
+    return vivo, listo, resumen, json.loads(cuerpo)["fases_ms"]
+
+
+def mediana(valores):
+    valores = sorted(valores)
+    return valores[len(valores) // 2]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta_snapshot = os.path.join(carpeta, "cochera.snapshot")
+        if n:
+            print(f"Guardando snapshot con {n:,} vehículos...")
+            poblar(n).to_snapshot(ruta_snapshot)
+
+        for modo in ("normal", "rapido"):
+            medidas = [arrancar(modo, carpeta, ruta_snapshot) for _ in range(repeticiones)]
+            vivo = mediana([m[0] for m in medidas])
+            listo = mediana([m[1] for m in medidas])
+            resumen = mediana([m[2] for m in medidas])
+            print(f"Modo {modo} (mediana de {repeticiones}):")
+            print(f"  primera respuesta (/healthz)   {vivo * 1000:8.0f} ms")
+            print(f"  listo (/readyz)                {listo * 1000:8.0f} ms")
+            print(f"  primer /resumen con estado     {resumen * 1000:8.0f} ms")
+            fases = "  ".join(f"{fase} {ms:.0f}" for fase, ms in medidas[-1][3].items())
+            print(f"  fases en el proceso (ms)       {fases}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# ==========================================
+#  BENCHMARK: EXPORTS EN STREAMING VS RESPUESTA COMPLETA
+#  Mide pico de RSS del servidor y tiempo hasta el primer byte por HTTP
+#
+#  Uso: python -m benchmarks.bench_export [n_vehiculos]
+#
+#  Cada medición levanta un uvicorn nuevo con el snapshot cargado, hace una
+#  sola request y lo detiene: el pico de RSS (ru_maxrss que entrega os.wait4
+#  para ese proceso) corresponde sólo a esa request. El primer byte es el
+#  primer byte del cuerpo recibido por el cliente (chunked en los exports).
+# ==========================================
+
+import http.client
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_arranque import esperar_200, puerto_libre
+from benchmarks.bench_snapshot import poblar
+
+DEUDORES = {"mes_actual": 6, "anio_actual": 2025}
+
+
+def pedir(puerto, metodo, ruta, cuerpo=None):
+    """Retorna (segundos hasta el primer byte del cuerpo, segundos totales, bytes)."""
+    conexion = http.client.HTTPConnection("127.0.0.1", puerto, timeout=600)
+    cabeceras = {"Content-Type": "application/json"} if cuerpo is not None else {}
+    inicio = time.perf_counter()
+    conexion.request(metodo, ruta, body=cuerpo and json.dumps(cuerpo), headers=cabeceras)
+    respuesta = conexion.getresponse()
+    total_bytes = len(respuesta.read(1))
+    primer_byte = time.perf_counter() - inicio
+    while True:
+        bloque = respuesta.read(1 << 20)
+        if not bloque:
+            break
+        total_bytes += len(bloque)
+    total = time.perf_counter() - inicio
+    conexion.close()
+    if respuesta.status != 200:
+        raise RuntimeError(f"{ruta} respondió {respuesta.status}")
+    return primer_byte, total, total_bytes
+
+
+def medir(nombre, carpeta, ruta_snapshot, metodo, ruta, cuerpo=None):
+    puerto = puerto_libre()
+    entorno = dict(os.environ, APPARKALA_SNAPSHOT=ruta_snapshot, APPARKALA_TASA="0",
+                   APPARKALA_GARAJES=os.path.join(carpeta, "garajes"))
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(puerto),
+         "--log-level", "warning", "--no-access-log"],
+        env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        esperar_200(puerto, "/readyz", time.perf_counter())
+        primer_byte, total, total_bytes = pedir(puerto, metodo, ruta, cuerpo)
+    finally:
+        proceso.send_signal(signal.SIGTERM)
+        # wait4 entrega el uso de recursos de este hijo en particular
+        _, _, uso = os.wait4(proceso.pid, 0)
+        proceso.returncode = 0
+    # ru_maxrss está en KB en Linux
+    print(f"  {nombre:<28} primer byte {primer_byte * 1000:9.1f} ms | "
+          f"total {total:6.2f} s | pico RSS {uso.ru_maxrss / 1024:7.0f} MB | "
+          f"{total_bytes / 1e6:7.1f} MB")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta_snapshot = os.path.join(carpeta, "cochera.snapshot")
+        print(f"Guardando snapshot con {n:,} vehículos...")
+        poblar(n).to_snapshot(ruta_snapshot)
+
+        print("Servidor sin exports (referencia):")
+        medir("sólo /healthz", carpeta, ruta_snapshot, "GET", "/healthz")
+
+        print("Vehículos:")
+        medir("GET /casillas (completa)", carpeta, ruta_snapshot, "GET", "/casillas")
+        medir("streaming ndjson", carpeta, ruta_snapshot, "GET", "/export/vehiculos?formato=ndjson")
+        medir("streaming csv", carpeta, ruta_snapshot, "GET", "/export/vehiculos?formato=csv")
+
+        print("Deudores:")
+        medir("POST /deudores (completa)", carpeta, ruta_snapshot, "POST", "/deudores", DEUDORES)
+        medir("streaming ndjson", carpeta, ruta_snapshot, "GET",
+              "/export/deudores?mes_actual=6&anio_actual=2025&formato=ndjson")
+
+        print("Historial:")
+        medir("GET /historial (completa)", carpeta, ruta_snapshot, "GET", "/historial")
+        medir("streaming ndjson", carpeta, ruta_snapshot, "GET", "/export/historial?formato=ndjson")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# ==========================================
+#  BENCHMARK: MUCHOS GARAJES EN UN PROCESO
+#  10.000 garajes, pocos "calientes", con presupuesto de memoria
+#
+#  Uso: python -m benchmarks.bench_garajes [n_garajes] [n_requests]
+#
+#  La segunda parte usa varios hilos: garajes calientes atendidos mientras
+#  otro hilo carga y expulsa garajes grandes, para ver que la E/S de un
+#  garaje frío no frena a los demás.
+# ==========================================
+
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from app.garajes import RegistroGarajes
+from benchmarks.bench_snapshot import poblar
+
+FRACCION_CALIENTE = 0.01   # 1% de los garajes recibe...
+TRAFICO_CALIENTE = 0.95    # ...el 95% de las requests
+PRESUPUESTO_MB = 32
+
+# Parte concurrente
+HILOS_CALIENTES = 4
+REQUESTS_POR_HILO = 20_000
+GARAJES_GRANDES = 10
+VEHICULOS_GRANDES = 20_000  # cada carga desde disco tarda decenas de ms
+PRESUPUESTO_CONCURRENTE_MB = 16
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+def poblar_garaje(cochera, semilla):
+    for i in range(30):
+        cochera.registrar_vehiculo("CARRO", f"G{semilla}-{i}", f"Dueño {i}", f"{i:08d}",
+                                   "999999999", "Toyota", "Yaris", 1, 2025)
+
+
+def main():
+    n_garajes = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    n_requests = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    random.seed(7)
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        registro = RegistroGarajes(carpeta, PRESUPUESTO_MB * 1024 * 1024)
+        print(f"Creando {n_garajes:,} garajes...")
+        inicio = time.perf_counter()
+        for g in range(n_garajes):
+            poblar_garaje(registro.crear(f"g{g}"), g)
+        registro.guardar_todos()
+        print(f"  {time.perf_counter() - inicio:.1f} s")
+
+        ids = [f"g{g}" for g in range(n_garajes)]
+        calientes = ids[:max(1, int(n_garajes * FRACCION_CALIENTE))]
+
+        tracemalloc.start()
+        latencias = {"caliente": [], "frío": []}
+        cargas_previas = registro.cargas
+        for r in range(n_requests):
+            if random.random() < TRAFICO_CALIENTE:
+                tipo, garaje_id = "caliente", random.choice(calientes)
+            else:
+                tipo, garaje_id = "frío", random.choice(ids)
+            inicio = time.perf_counter()
+            with registro.usar(garaje_id) as cochera:
+                placa = f"R{r}"
+                if cochera.registrar_vehiculo("MOTO", placa, "x", "1", "2", "Honda", "CB", 1, 2025):
+                    cochera.eliminar_vehiculo(placa)
+            latencias[tipo].append(time.perf_counter() - inicio)
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        stats = registro.estadisticas()
+        print(f"Requests: {n_requests:,} ({TRAFICO_CALIENTE:.0%} a {len(calientes)} garajes calientes)")
+        for tipo, valores in latencias.items():
+            print(f"  {tipo:<9} n={len(valores):6d}  p50 {percentil(valores, 0.5) * 1e3:7.3f} ms"
+                  f"  p99 {percentil(valores, 0.99) * 1e3:7.3f} ms")
+        print(f"Garajes en memoria: {stats['en_memoria']:,} de {n_garajes:,}")
+        print(f"Memoria estimada:   {stats['memoria_estimada'] / 1e6:.1f} MB"
+              f" (presupuesto {PRESUPUESTO_MB} MB)")
+        print(f"Pico tracemalloc:   {pico / 1e6:.1f} MB")
+        print(f"Cargas desde disco: {registro.cargas - cargas_previas:,}"
+              f" | expulsiones totales: {stats['expulsiones']:,}")
+
+
+def usar_y_modificar(registro, garaje_id, placa):
+    with registro.usar(garaje_id) as cochera:
+        if cochera.registrar_vehiculo("MOTO", placa, "x", "1", "2", "Honda", "CB", 1, 2025):
+            cochera.eliminar_vehiculo(placa)
+
+
+def concurrente(carpeta, con_frios):
+    """p50/p99 de los garajes calientes con (o sin) un hilo cargando garajes grandes."""
+    registro = RegistroGarajes(carpeta, PRESUPUESTO_CONCURRENTE_MB * 1024 * 1024)
+    calientes = [f"caliente{i}" for i in range(HILOS_CALIENTES * 2)]
+    for garaje_id in calientes:
+        if not registro.existe(garaje_id):
+            poblar_garaje(registro.crear(garaje_id), garaje_id)
+    registro.guardar_todos()
+
+    terminado = threading.Event()
+    cargas = [0]
+
+    def frios():
+        r = 0
+        while not terminado.is_set():
+            # Cada uso deja cambios: al expulsarlo también hay que guardarlo
+            usar_y_modificar(registro, f"grande{r % GARAJES_GRANDES}", f"F{r}")
+            r += 1
+        cargas[0] = registro.cargas
+
+    latencias = []
+
+    def atender(indice):
+        propias = []
+        for r in range(REQUESTS_POR_HILO):
+            inicio = time.perf_counter()
+            usar_y_modificar(registro, calientes[(indice + r) % len(calientes)], f"H{indice}-{r}")
+            propias.append(time.perf_counter() - inicio)
+        latencias.extend(propias)
+
+    hilo_frio = threading.Thread(target=frios) if con_frios else None
+    if hilo_frio:
+        hilo_frio.start()
+        time.sleep(0.5)
+    hilos = [threading.Thread(target=atender, args=(i,)) for i in range(HILOS_CALIENTES)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    terminado.set()
+    if hilo_frio:
+        hilo_frio.join()
+    nombre = "con cargas frías" if con_frios else "sin cargas frías"
+    print(f"  {nombre:<18} calientes p50 {percentil(latencias, 0.5) * 1e3:7.3f} ms"
+          f"  p99 {percentil(latencias, 0.99) * 1e3:7.3f} ms  | cargas de garajes grandes: {cargas[0]}")
+
+
+def main_concurrente():
+    with tempfile.TemporaryDirectory() as carpeta:
+        print(f"Garajes grandes: {GARAJES_GRANDES} con {VEHICULOS_GRANDES:,} vehículos...")
+        grande = poblar(VEHICULOS_GRANDES)
+        for g in range(GARAJES_GRANDES):
+            grande.to_snapshot(os.path.join(carpeta, f"grande{g}.snapshot"))
+        print(f"{HILOS_CALIENTES} hilos x {REQUESTS_POR_HILO:,} requests a garajes calientes"
+              f" (presupuesto {PRESUPUESTO_CONCURRENTE_MB} MB):")
+        concurrente(carpeta, con_frios=False)
+        concurrente(carpeta, con_frios=True)
+
+
+if __name__ == "__main__":
+    main()
+    main_concurrente()
@@ -0,0 +1,88 @@
+# ==========================================
+#  BENCHMARK: CONSULTAS DEL HISTORIAL
+#  Índices por placa/casilla vs recorrer todos los eventos
+#
+#  Uso: python -m benchmarks.bench_historial [n_eventos] [n_placas]
+# ==========================================
+
+import random
+import sys
+import time
+
+from app.historial import EVENTOS, Historial
+
+DIA = 24 * 3600
+N_CASILLAS = 10_000
+N_CONSULTAS = 2_000
+
+
+def poblar(n_eventos, n_placas):
+    """Eventos repartidos a lo largo de un año, de placas y casillas al azar."""
+    historial = Historial()
+    inicio = time.time() - 365 * DIA
+    paso = 365 * DIA / n_eventos
+    for i in range(n_eventos):
+        placa = f"P{random.randrange(n_placas):06d}"
+        casilla = f"C{random.randrange(N_CASILLAS) + 1}"
+        evento = EVENTOS[i % 3]  # REGISTRO, PAGO, SALIDA
+        historial.registrar(evento, "CARRO", placa, casilla, mes=i % 12 + 1, anio=2025,
+                            tiempo=inicio + i * paso)
+    return historial, inicio
+
+
+def consulta_ingenua(historial, placa, desde, hasta, offset, limite):
+    """Lo que habría que hacer sin índices: revisar todos los eventos."""
+    tiempos = historial.tiempos
+    ids = [i for i, p in enumerate(historial.placas)
+           if p == placa and desde <= tiempos[i] < hasta]
+    return len(ids), [historial.evento(i) for i in ids[offset:offset + limite]]
+
+
+def medir(nombre, consultas, consultar):
+    tiempos = []
+    for consulta in consultas:
+        t = time.perf_counter()
+        consultar(*consulta)
+        tiempos.append(time.perf_counter() - t)
+    tiempos.sort()
+    print(f"  {nombre:<34} media {sum(tiempos) / len(tiempos) * 1e6:12.1f} µs | "
+          f"p99 {tiempos[int(len(tiempos) * 0.99)] * 1e6:12.1f} µs")
+
+
+def main():
+    n_eventos = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    n_placas = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000
+    random.seed(7)
+    t = time.perf_counter()
+    historial, inicio = poblar(n_eventos, n_placas)
+    print(f"{len(historial):,} eventos de {n_placas:,} placas en {N_CASILLAS:,} casillas"
+          f" (cargados en {time.perf_counter() - t:.1f} s)")
+
+    consultas = []
+    for _ in range(N_CONSULTAS):
+        desde = inicio + random.uniform(0, 300 * DIA)
+        consultas.append((f"P{random.randrange(n_placas):06d}", desde,
+                          desde + random.uniform(1, 60) * DIA, random.choice((0, 0, 10)), 50))
+
+    # Se verifica que ambas formas den lo mismo
+    for consulta in consultas[:3]:
+        assert historial.de_placa(*consulta) == consulta_ingenua(historial, *consulta)
+
+    print("Eventos de una placa (rango de fechas + página de 50):")
+    medir("índice por placa", consultas, historial.de_placa)
+    medir("recorriendo todos los eventos", consultas[:5],
+          lambda *c: consulta_ingenua(historial, *c))
+
+    print("Eventos de una casilla (sin rango, página de 50):")
+    por_casilla = [(f"C{random.randrange(N_CASILLAS) + 1}", None, None, 0, 50)
+                   for _ in range(N_CONSULTAS)]
+    medir("índice por casilla", por_casilla, historial.de_casilla)
+
+    t = time.perf_counter()
+    for i in range(100_000):
+        historial.registrar("REGISTRO", "CARRO", f"N{i}", f"C{i % N_CASILLAS + 1}")
+    print(f"registrar (con índices): {(time.perf_counter() - t) / 100_000 * 1e6:.2f} µs por evento")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# ==========================================
+#  BENCHMARK: RÁFAGAS DE CÁMARAS LECTORAS DE PLACAS
+#  Varias puertas mandando eventos en hora punta, con lecturas repetidas
+#
+#  Uso: python -m benchmarks.bench_ingesta [eventos_por_segundo] [segundos]
+# ==========================================
+
+import asyncio
+import random
+import sys
+import time
+from contextlib import contextmanager
+
+from app.ingesta import ColaLlena, EventoPlaca, PipelineIngesta
+from app.models import Cochera
+
+PUERTAS = 12
+PROB_RELECTURA = 0.3     # la cámara lee la misma placa dos veces
+INTERVALO_RAFAGA = 0.05  # cada puerta envía sus eventos cada 50 ms
+CAPACIDAD_COLA = 2_000
+
+
+async def puerta(numero, pipeline, eventos_por_segundo, segundos, placas_dentro, rechazos):
+    por_rafaga = max(1, int(eventos_por_segundo * INTERVALO_RAFAGA / PUERTAS))
+    fin = time.monotonic() + segundos
+    secuencia = 0
+    while time.monotonic() < fin:
+        rafaga = []
+        for _ in range(por_rafaga):
+            if placas_dentro and random.random() < 0.5:
+                placa = placas_dentro.pop(random.randrange(len(placas_dentro)))
+                evento = "SALIDA"
+            else:
+                secuencia += 1
+                placa = f"P{numero:02d}{secuencia:06d}"
+                placas_dentro.append(placa)
+                evento = "ENTRADA"
+            rafaga.append(EventoPlaca(placa, evento, camara=f"puerta-{numero}"))
+            if random.random() < PROB_RELECTURA:
+                rafaga.append(EventoPlaca(placa, evento, camara=f"puerta-{numero}"))
+        try:
+            pipeline.encolar(rafaga)
+        except ColaLlena:
+            rechazos.append(len(rafaga))
+        await asyncio.sleep(INTERVALO_RAFAGA)
+
+
+async def escenario(nombre, eventos_por_segundo, segundos):
+    cochera = Cochera(capacidad_carros=5_000, capacidad_motos=0)
+
+    @contextmanager
+    def usar_cochera(garaje_id):
+        yield cochera
+
+    pipeline = PipelineIngesta(usar_cochera, capacidad=CAPACIDAD_COLA)
+    pipeline.iniciar()
+    placas_dentro = []
+    rechazos = []
+    inicio = time.monotonic()
+    await asyncio.gather(*(puerta(n, pipeline, eventos_por_segundo, segundos,
+                                  placas_dentro, rechazos) for n in range(PUERTAS)))
+    await pipeline.detener(espera=30)
+    duracion = time.monotonic() - inicio
+
+    m = pipeline.metricas()
+    print(f"{nombre} ({eventos_por_segundo} ev/s objetivo, {PUERTAS} puertas):")
+    print(f"  recibidos {m['recibidos']:,} | duplicados {m['duplicados']:,} | "
+          f"rechazados {m['rechazados']:,} en {len(rechazos)} ráfagas")
+    print(f"  aplicados {m['aplicados']:,} en {m['lotes']:,} lotes "
+          f"({m['aplicados'] / duracion:,.0f} ev/s)")
+    print(f"  lag p50 {m['lag_p50_ms']:.1f} ms | p99 {m['lag_p99_ms']:.1f} ms | "
+          f"máx {m['lag_max_ms']:.1f} ms")
+
+
+def main():
+    eventos_por_segundo = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    segundos = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    random.seed(3)
+    asyncio.run(escenario("Hora punta", eventos_por_segundo, segundos))
+    asyncio.run(escenario("Sobrecarga", eventos_por_segundo * 20, segundos))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+# ==========================================
+#  BENCHMARK: TOKENS DE SESIÓN Y LÍMITE DE TASA
+#  Costo por request y latencia de un cliente normal con un cliente abusivo
+#
+#  Uso: python -m benchmarks.bench_limite [n_vehiculos] [hilos_abusivos]
+# ==========================================
+
+import http.client
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+from app.seguridad import FirmadorTokens, LimitadorTasa
+from benchmarks.bench_arranque import esperar_200, puerto_libre
+from benchmarks.bench_snapshot import poblar
+
+SECRETO = "secreto-de-benchmark"
+N_LLAMADAS = 200_000
+INTERVALO_NORMAL = 0.1    # el cliente normal pide 10 veces por segundo
+REQUESTS_NORMAL = 100
+SIN_LIMITE = 1e9          # tasa tan alta que nunca rechaza
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(len(valores) * p))]
+
+
+# -------------------------------
+#  EN PROCESO
+# -------------------------------
+def por_llamada(funcion, n=N_LLAMADAS):
+    inicio = time.perf_counter()
+    for _ in range(n):
+        funcion()
+    return (time.perf_counter() - inicio) / n * 1e6
+
+
+def con_hilos(limitador, n_hilos, n=N_LLAMADAS):
+    """Llamadas por segundo con n_hilos clientes distintos a la vez."""
+    def trabajar(cliente):
+        for _ in range(n // n_hilos):
+            limitador.permitir(cliente)
+
+    hilos = [threading.Thread(target=trabajar, args=(f"10.0.0.{i}",)) for i in range(n_hilos)]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return n / (time.perf_counter() - inicio)
+
+
+def medir_en_proceso():
+    firmador = FirmadorTokens(SECRETO.encode())
+    token, _ = firmador.emitir("admin")
+    limitador = LimitadorTasa(SIN_LIMITE, SIN_LIMITE)
+    print("En proceso (por llamada):")
+    print(f"  verificar token                    "
+          f"{por_llamada(lambda: firmador.verificar(token)):6.2f} µs")
+    print(f"  permitir (mismo cliente)           "
+          f"{por_llamada(lambda: limitador.permitir('10.0.0.1')):6.2f} µs")
+    for fragmentos in (1, 16):
+        tasa = con_hilos(LimitadorTasa(SIN_LIMITE, SIN_LIMITE, n_fragmentos=fragmentos), 8)
+        print(f"  8 hilos, {fragmentos:>2} fragmento(s)            {tasa / 1e6:6.2f} M llamadas/s")
+
+
+# -------------------------------
+#  SERVIDOR REAL
+# -------------------------------
+@contextmanager
+def servidor(carpeta, ruta_snapshot, tasa):
+    """Levanta uvicorn con la tasa indicada (0 = sin límite) y entrega su puerto."""
+    puerto = puerto_libre()
+    # Como detrás de un proxy: cada cliente se distingue por X-Forwarded-For
+    entorno = dict(os.environ, APPARKALA_SNAPSHOT=ruta_snapshot, APPARKALA_SECRETO=SECRETO,
+                   APPARKALA_TASA=str(tasa), APPARKALA_PROXIES="1",
+                   APPARKALA_GARAJES=os.path.join(carpeta, "garajes"))
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(puerto),
+         "--log-level", "warning", "--no-access-log"],
+        env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        esperar_200(puerto, "/readyz", time.perf_counter())
+        yield puerto
+    finally:
+        proceso.terminate()
+        proceso.wait()
+
+
+class Cliente:
+    """Conexión keep-alive que hace GETs con un token (o sin él) desde una IP."""
+
+    def __init__(self, puerto, token=None, ip="198.51.100.1"):
+        self.conexion = http.client.HTTPConnection("127.0.0.1", puerto, timeout=30)
+        self.cabeceras = {"X-Forwarded-For": ip}
+        if token:
+            self.cabeceras["Authorization"] = f"Bearer {token}"
+
+    def get(self, ruta):
+        self.conexion.request("GET", ruta, headers=self.cabeceras)
+        respuesta = self.conexion.getresponse()
+        respuesta.read()
+        return respuesta.status
+
+
+def abusar(puerto, token, n_hilos, detener, contadores):
+    """Proceso aparte: n_hilos piden /casillas sin pausa hasta que se detenga."""
+    def trabajar():
+        cliente = Cliente(puerto, token, ip="203.0.113.66")
+        while not detener.is_set():
+            status = cliente.get("/casillas")
+            with contadores.get_lock():
+                contadores[0 if status == 200 else 1] += 1
+
+    hilos = [threading.Thread(target=trabajar) for _ in range(n_hilos)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+
+def escenario(nombre, carpeta, ruta_snapshot, tasa, hilos_abusivos):
+    """Latencia de un cliente normal (10 req/s) mientras otro abusa del servidor."""
+    contexto = multiprocessing.get_context("spawn")
+    firmador = FirmadorTokens(SECRETO.encode())
+    detener = contexto.Event()
+    contadores = contexto.Array("q", 2)  # [respondidas, rechazadas]
+    with servidor(carpeta, ruta_snapshot, tasa) as puerto:
+        abusivo = None
+        if hilos_abusivos:
+            abusivo = contexto.Process(target=abusar, args=(
+                puerto, firmador.emitir("abusivo")[0], hilos_abusivos, detener, contadores))
+            abusivo.start()
+            time.sleep(1.0)
+
+        normal = Cliente(puerto, firmador.emitir("normal")[0])
+        latencias = []
+        errores = 0
+        inicio = time.perf_counter()
+        for _ in range(REQUESTS_NORMAL):
+            t = time.perf_counter()
+            errores += normal.get("/casillas") != 200
+            latencias.append(time.perf_counter() - t)
+            time.sleep(max(0.0, INTERVALO_NORMAL - (time.perf_counter() - t)))
+        duracion = time.perf_counter() - inicio
+
+        detener.set()
+        if abusivo is not None:
+            abusivo.join()
+
+    texto = (f"  {nombre:<30} normal p50 {percentil(latencias, 0.5) * 1e3:6.1f} ms | "
+             f"p99 {percentil(latencias, 0.99) * 1e3:6.1f} ms | errores {errores}")
+    if hilos_abusivos:
+        texto += (f" | abusivo {contadores[0] / duracion:5.0f} ok/s, "
+                  f"{contadores[1] / duracion:5.0f} rechazadas/s")
+    print(texto)
+
+
+def medir_overhead(carpeta, ruta_snapshot):
+    """Latencia secuencial de /resumen sin límite ni token vs con ambos."""
+    for nombre, tasa, token in (("sin token ni límite", 0, None),
+                                ("con token y límite", SIN_LIMITE, "admin")):
+        with servidor(carpeta, ruta_snapshot, tasa) as puerto:
+            firmador = FirmadorTokens(SECRETO.encode())
+            cliente = Cliente(puerto, token and firmador.emitir(token)[0])
+            for _ in range(500):
+                cliente.get("/resumen")
+            latencias = []
+            for _ in range(3000):
+                t = time.perf_counter()
+                cliente.get("/resumen")
+                latencias.append(time.perf_counter() - t)
+        print(f"  {nombre:<30} media {sum(latencias) / len(latencias) * 1e6:6.0f} µs | "
+              f"p99 {percentil(latencias, 0.99) * 1e6:6.0f} µs")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    hilos_abusivos = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    medir_en_proceso()
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta_snapshot = os.path.join(carpeta, "cochera.snapshot")
+        poblar(n).to_snapshot(ruta_snapshot)
+
+        print("Servidor, /resumen secuencial (costo agregado por request):")
+        medir_overhead(carpeta, ruta_snapshot)
+
+        print(f"Servidor, /casillas con {n:,} vehículos "
+              f"(cliente abusivo con {hilos_abusivos} conexiones):")
+        escenario("sólo cliente normal", carpeta, ruta_snapshot, 20, 0)
+        escenario("abusivo, sin límite", carpeta, ruta_snapshot, 0, hilos_abusivos)
+        escenario("abusivo, límite 20 req/s", carpeta, ruta_snapshot, 20, hilos_abusivos)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# ==========================================
+#  BENCHMARK: DISPONIBILIDAD CON RESERVAS
+#  100.000 reservas repartidas en 10.000 casillas
+#
+#  Uso: python -m benchmarks.bench_reservas [n_casillas] [n_reservas]
+# ==========================================
+
+import random
+import sys
+import time
+
+from app.models import Cochera
+from app.reservas import Reserva
+
+HORA = 3600
+HORIZONTE = 7 * 24 * HORA  # las reservas caen en la próxima semana
+N_CONSULTAS = 2_000
+
+
+def poblar(n_casillas, n_reservas):
+    """Reparte reservas sin solaparse; cubren la mayor parte del horizonte."""
+    cochera = Cochera(capacidad_carros=n_casillas, capacidad_motos=0)
+    base = time.time() + HORA
+    por_casilla = n_reservas // n_casillas
+    tramo = HORIZONTE / por_casilla
+    for i in range(n_casillas):
+        for k in range(por_casilla):
+            inicio = base + k * tramo + random.uniform(0, tramo * 0.2)
+            fin = inicio + tramo * random.uniform(0.6, 0.8)
+            reserva = Reserva(cochera.siguiente_reserva, "CARRO", i + 1, f"R{i}-{k}", inicio, fin)
+            cochera.siguiente_reserva += 1
+            cochera._agregar_reserva(reserva)  # noqa: SLF001
+    return cochera, base
+
+
+def disponibilidad_ingenua(cochera, inicio, fin):
+    """Lo que habría que hacer sin agendas: revisar todas las reservas."""
+    ocupadas = set()
+    for reserva in cochera.reservas.values():
+        if reserva.inicio < fin and inicio < reserva.fin:
+            ocupadas.add(reserva.casilla_numero - 1)
+    for i, veh in enumerate(cochera.casillas_carros):
+        if veh is None and i not in ocupadas:
+            return i
+    return None
+
+
+def medir(nombre, consultas, buscar):
+    tiempos = []
+    for inicio, fin in consultas:
+        t = time.perf_counter()
+        buscar(inicio, fin)
+        tiempos.append(time.perf_counter() - t)
+    tiempos.sort()
+    print(f"  {nombre:<30} media {sum(tiempos) / len(tiempos) * 1e6:10.1f} µs | "
+          f"p99 {tiempos[int(len(tiempos) * 0.99)] * 1e6:10.1f} µs")
+
+
+def main():
+    n_casillas = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    n_reservas = int(sys.argv[2]) if len(sys.argv) > 2 else 100_000
+    random.seed(11)
+    t = time.perf_counter()
+    cochera, base = poblar(n_casillas, n_reservas)
+    print(f"{len(cochera.reservas):,} reservas en {n_casillas:,} casillas"
+          f" (cargadas en {time.perf_counter() - t:.1f} s)")
+
+    consultas = []
+    for _ in range(N_CONSULTAS):
+        inicio = base + random.uniform(0, HORIZONTE)
+        consultas.append((inicio, inicio + random.uniform(1, 8) * HORA))
+
+    # Se verifica que ambas formas coincidan en si hay o no casilla disponible
+    for inicio, fin in consultas[:50]:
+        assert (cochera.buscar_casilla_disponible("CARRO", inicio, fin) is None) == \
+            (disponibilidad_ingenua(cochera, inicio, fin) is None)
+
+    print("Primera casilla disponible:")
+    medir("árbol de huecos", consultas,
+          lambda i, f: cochera.buscar_casilla_disponible("CARRO", i, f))
+    medir("recorriendo todas las reservas", consultas[:200],
+          lambda i, f: disponibilidad_ingenua(cochera, i, f))
+
+    # Registrar un vehículo nuevo debe saltar las casillas con reservas dentro
+    # del horizonte. Todas las casillas tienen una reserva en las próximas
+    # horas, así que con 24 h no queda ninguna y con 30 min sí.
+    for horas in (24, 0.5):
+        cochera.horizonte_reservas = horas * HORA
+        t = time.perf_counter()
+        veh = cochera.registrar_vehiculo("CARRO", f"NUEVO{horas}", "x", "1", "2", "m", "n", 1, 2025)
+        print(f"registrar_vehiculo, horizonte {horas:>4} h: {(time.perf_counter() - t) * 1e3:.2f} ms"
+              f" -> {veh.to_dict()['nombre_casilla'] if veh else 'sin casilla'}")
+
+
+if __name__ == "__main__":
+    main()
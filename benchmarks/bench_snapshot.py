@@ -0,0 +1,105 @@
+# ==========================================
+#  BENCHMARK: SNAPSHOT BINARIO VS JSON
+#  Compara tiempo de volcado/carga y tamaño en disco
+#
+#  Uso: python -m benchmarks.bench_snapshot [n_vehiculos]
+# ==========================================
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+from app.models import Cochera, Vehiculo
+
+MARCAS = [("Toyota", "Yaris"), ("Kia", "Rio"), ("Hyundai", "Accent"),
+          ("Honda", "CB190"), ("Nissan", "Sentra"), ("Suzuki", "Swift")]
+
+
+def poblar(n):
+    """Crea una cochera con n vehículos (80% carros, 20% motos)."""
+    n_motos = n // 5
+    n_carros = n - n_motos
+    cochera = Cochera(capacidad_carros=n_carros, capacidad_motos=n_motos)
+    # Se llenan las casillas directamente: registrar_vehiculo recorre todas
+    # las casillas en cada alta y sería cuadrático a este tamaño.
+    for i in range(n):
+        tipo = "CARRO" if i < n_carros else "MOTO"
+        numero = i + 1 if tipo == "CARRO" else i - n_carros + 1
+        marca, modelo = MARCAS[i % len(MARCAS)]
+        veh = Vehiculo(tipo, f"P{i:07d}", f"Dueño {i % 50000}", f"{40000000 + i}",
+                       f"9{i:08d}", marca, modelo, tipo, numero, i % 12 + 1, 2025,
+                       cochera.tarifa_carro if tipo == "CARRO" else cochera.tarifa_moto)
+        if tipo == "CARRO":
+            cochera.casillas_carros[numero - 1] = veh
+        else:
+            cochera.casillas_motos[numero - 1] = veh
+        cochera.historial.registrar("REGISTRO", tipo, veh.placa, f"{tipo[0]}{numero}")
+    return cochera
+
+
+def volcar_json(cochera, ruta):
+    datos = {
+        "tarifa_carro": cochera.tarifa_carro,
+        "tarifa_moto": cochera.tarifa_moto,
+        "carros": [v and v.to_dict() for v in cochera.casillas_carros],
+        "motos": [v and v.to_dict() for v in cochera.casillas_motos],
+        "historial": list(cochera.historial),
+    }
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump(datos, archivo)
+
+
+def cargar_json(ruta):
+    with open(ruta, encoding="utf-8") as archivo:
+        datos = json.load(archivo)
+    cochera = Cochera(len(datos["carros"]), len(datos["motos"]),
+                      datos["tarifa_carro"], datos["tarifa_moto"])
+    for lista, destino in ((datos["carros"], cochera.casillas_carros),
+                           (datos["motos"], cochera.casillas_motos)):
+        for i, d in enumerate(lista):
+            if d is not None:
+                d.pop("nombre_casilla")
+                destino[i] = Vehiculo(**d)
+    cochera.historial = datos["historial"]
+    return cochera
+
+
+def medir(nombre, funcion):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    print(f"  {nombre:<28} {time.perf_counter() - inicio:8.2f} s")
+    return resultado
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"Poblando cochera con {n:,} vehículos...")
+    cochera = poblar(n)
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        rutas = {
+            "json": os.path.join(carpeta, "cochera.json"),
+            "snapshot": os.path.join(carpeta, "cochera.snapshot"),
+            "snapshot sin comprimir": os.path.join(carpeta, "cochera_raw.snapshot"),
+        }
+        print("Volcado:")
+        medir("json", lambda: volcar_json(cochera, rutas["json"]))
+        medir("snapshot (zlib)", lambda: cochera.to_snapshot(rutas["snapshot"]))
+        medir("snapshot (sin comprimir)",
+              lambda: cochera.to_snapshot(rutas["snapshot sin comprimir"], comprimir=False))
+
+        print("Carga:")
+        medir("json", lambda: cargar_json(rutas["json"]))
+        medir("snapshot (zlib)", lambda: Cochera.from_snapshot(rutas["snapshot"]))
+        medir("snapshot (sin comprimir)",
+              lambda: Cochera.from_snapshot(rutas["snapshot sin comprimir"]))
+
+        print("Tamaño en disco:")
+        for nombre, ruta in rutas.items():
+            print(f"  {nombre:<28} {os.path.getsize(ruta) / 1e6:8.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+# ==========================================
+#  TESTS: INGESTA DE EVENTOS DE CÁMARAS
+# ==========================================
+
+from contextlib import contextmanager
+
+from app.ingesta import EventoPlaca, PipelineIngesta
+from app.models import Cochera
+
+
+def test_un_garaje_que_falla_no_frena_el_lote():
+    cocheras = {None: Cochera(), "norte": Cochera()}
+
+    @contextmanager
+    def usar_cochera(garaje_id):
+        if garaje_id == "roto":
+            raise OSError("snapshot ilegible")
+        yield cocheras.get(garaje_id)
+
+    ingesta = PipelineIngesta(usar_cochera)
+    lote = [
+        EventoPlaca("AAA111", "ENTRADA"),
+        EventoPlaca("BBB222", "ENTRADA", garaje_id="roto"),
+        EventoPlaca("CCC333", "ENTRADA", garaje_id="norte"),
+        EventoPlaca("DDD444", "ENTRADA", garaje_id="norte"),
+        EventoPlaca("EEE555", "ENTRADA", garaje_id="inexistente"),
+    ]
+    assert ingesta._aplicar_lote(lote) == 3
+    assert cocheras[None].buscar_por_placa("AAA111") is not None
+    assert cocheras["norte"].buscar_por_placa("DDD444") is not None
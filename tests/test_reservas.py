@@ -0,0 +1,134 @@
+# ==========================================
+#  TESTS: AGENDA E ÍNDICE DE HUECOS DE RESERVAS
+#  Secuencias aleatorias comparadas contra fuerza bruta
+# ==========================================
+
+import random
+import time
+
+import pytest
+
+from app.models import Cochera
+from app.reservas import AgendaCasilla, IndiceHuecos, Reserva
+
+N_CASILLAS = 8
+HORIZONTE = 100      # tiempos enteros chicos para forzar cruces y bordes
+OPERACIONES = 400
+HORA = 3600
+
+
+def se_cruzan(reserva, inicio, fin):
+    return reserva.inicio < fin and inicio < reserva.fin
+
+
+def libres_por_fuerza_bruta(reservas, inicio, fin):
+    """Casillas sin ninguna reserva que se cruce con [inicio, fin)."""
+    return {casilla for casilla in range(N_CASILLAS)
+            if not any(se_cruzan(r, inicio, fin) for r in reservas[casilla])}
+
+
+def intervalo_aleatorio(azar):
+    inicio = azar.randrange(HORIZONTE)
+    return inicio, inicio + azar.randint(1, 20)
+
+
+@pytest.mark.parametrize("semilla", range(20))
+def test_buscar_coincide_con_fuerza_bruta(semilla):
+    azar = random.Random(semilla)
+    agendas = [AgendaCasilla() for _ in range(N_CASILLAS)]
+    reservas = [[] for _ in range(N_CASILLAS)]
+    indice = IndiceHuecos()
+    for casilla in range(N_CASILLAS):
+        indice.reemplazar(casilla, agendas[casilla].huecos())
+    siguiente_id = 1
+
+    for _ in range(OPERACIONES):
+        casilla = azar.randrange(N_CASILLAS)
+        if reservas[casilla] and azar.random() < 0.4:
+            reserva = reservas[casilla].pop(azar.randrange(len(reservas[casilla])))
+            agendas[casilla].quitar(reserva)
+        else:
+            inicio, fin = intervalo_aleatorio(azar)
+            if any(se_cruzan(r, inicio, fin) for r in reservas[casilla]):
+                continue
+            reserva = Reserva(siguiente_id, "CARRO", casilla + 1, f"P{siguiente_id}", inicio, fin)
+            siguiente_id += 1
+            reservas[casilla].append(reserva)
+            agendas[casilla].agregar(reserva)
+        indice.reemplazar(casilla, agendas[casilla].huecos())
+
+        assert len(indice) == sum(len(agenda.huecos()) for agenda in agendas)
+        for _ in range(5):
+            inicio, fin = intervalo_aleatorio(azar)
+            libres = libres_por_fuerza_bruta(reservas, inicio, fin)
+            encontrada = indice.buscar(inicio, fin)
+            if libres:
+                assert encontrada in libres
+            else:
+                assert encontrada is None
+
+
+def test_agenda_ordenada_y_purgar():
+    azar = random.Random(0)
+    agenda = AgendaCasilla()
+    inicio = 0
+    for i in range(50):
+        inicio += azar.randint(0, 3)
+        fin = inicio + azar.randint(1, 5)
+        agenda.agregar(Reserva(i, "MOTO", 1, f"P{i}", inicio, fin))
+        inicio = fin
+
+    assert agenda.inicios == sorted(agenda.inicios)
+    assert agenda.fines == sorted(agenda.fines)
+    # Huecos y reservas cubren la recta sin solaparse ni dejar espacios
+    tramos = sorted(agenda.huecos() + list(zip(agenda.inicios, agenda.fines)))
+    for (_, fin_anterior), (inicio_siguiente, _) in zip(tramos, tramos[1:]):
+        assert fin_anterior == inicio_siguiente
+
+    corte = agenda.fines[20]
+    vencidas = agenda.purgar(corte)
+    assert all(r.fin <= corte for r in vencidas)
+    assert all(r.fin > corte for r in agenda.reservas)
+    assert len(vencidas) + len(agenda) == 50
+
+
+# -------------------------------
+#  COCHERA: RESERVAS Y CASILLAS LIBRES
+# -------------------------------
+def registrar(cochera, placa):
+    return cochera.registrar_vehiculo("CARRO", placa, "x", "1", "2", "m", "n", 1, 2025)
+
+
+def test_resumen_coincide_con_casillas_libres():
+    cochera = Cochera(capacidad_carros=2, capacidad_motos=0)
+    ahora = time.time()
+    cochera.crear_reserva("CARRO", "R1", ahora + HORA, ahora + 2 * HORA)
+    registrar(cochera, "A1")
+
+    resumen = cochera.obtener_resumen()["carros"]
+    assert resumen == {"ocupadas": 1, "reservadas": 1, "libres": 0, "total": 2}
+    assert cochera.obtener_casillas_libres()["carros"] == []
+    assert [c["estado"] for c in cochera.obtener_casillas()["carros"]] == ["RESERVADA", "OCUPADA"]
+    assert registrar(cochera, "A2") is None
+
+
+def test_reserva_lejana_no_bloquea_la_casilla_hoy():
+    cochera = Cochera(capacidad_carros=1, capacidad_motos=0)
+    ahora = time.time()
+    cochera.crear_reserva("CARRO", "R1", ahora + 30 * 24 * HORA, ahora + 31 * 24 * HORA)
+
+    assert cochera.obtener_casillas_libres()["carros"] == ["C1"]
+    assert cochera.obtener_resumen()["carros"]["libres"] == 1
+    assert registrar(cochera, "A1") is not None
+
+
+def test_misma_placa_no_reserva_horarios_que_se_cruzan():
+    cochera = Cochera(capacidad_carros=3, capacidad_motos=2)
+    ahora = time.time()
+    primera = cochera.crear_reserva("CARRO", "p3", ahora + HORA, ahora + 3 * HORA)
+    assert primera is not None
+    assert cochera.crear_reserva("CARRO", "P3", ahora + 2 * HORA, ahora + 4 * HORA) is None
+    assert cochera.crear_reserva("MOTO", "P3", ahora + HORA, ahora + 2 * HORA) is None
+    # Pegada a la anterior no se cruza; otra placa en el mismo horario tampoco
+    assert cochera.crear_reserva("CARRO", "P3", ahora + 3 * HORA, ahora + 4 * HORA) is not None
+    assert cochera.crear_reserva("CARRO", "P4", ahora + HORA, ahora + 3 * HORA) is not None
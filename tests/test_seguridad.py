@@ -0,0 +1,147 @@
+# ==========================================
+#  TESTS: TOKENS DE SESIÓN Y MIDDLEWARE DE ACCESO
+# ==========================================
+
+import asyncio
+
+import pytest
+
+from app.seguridad import FirmadorTokens, LimitadorTasa, MiddlewareAcceso
+
+SECRETO = b"secreto-de-prueba"
+AHORA = 1_750_000_000
+
+
+# -------------------------------
+#  TOKENS
+# -------------------------------
+def test_emitir_y_verificar():
+    firmador = FirmadorTokens(SECRETO, duracion=60)
+    token, expira = firmador.emitir("admin", ahora=AHORA)
+    assert expira == AHORA + 60
+    assert firmador.verificar(token, ahora=AHORA) == "admin"
+    assert firmador.verificar(token, ahora=AHORA + 59) == "admin"
+
+
+def test_token_vencido():
+    firmador = FirmadorTokens(SECRETO, duracion=60)
+    token, expira = firmador.emitir("admin", ahora=AHORA)
+    assert firmador.verificar(token, ahora=expira) is None
+    assert firmador.verificar(token, ahora=expira + 3600) is None
+
+
+def test_usuario_con_separador():
+    firmador = FirmadorTokens(SECRETO)
+    token, _ = firmador.emitir("ana|admin", ahora=AHORA)
+    assert firmador.verificar(token, ahora=AHORA) == "ana|admin"
+
+
+def test_token_de_otro_secreto():
+    token, _ = FirmadorTokens(b"otro-secreto").emitir("admin", ahora=AHORA)
+    assert FirmadorTokens(SECRETO).verificar(token, ahora=AHORA) is None
+
+
+def test_token_alterado():
+    firmador = FirmadorTokens(SECRETO)
+    token, _ = firmador.emitir("admin", ahora=AHORA)
+    # Otros datos con la firma original: por ejemplo, estirar el vencimiento
+    datos_ajenos, _ = FirmadorTokens(SECRETO, duracion=10**9).emitir("admin", ahora=AHORA)
+    falsificado = datos_ajenos.split(".")[0] + "." + token.split(".")[1]
+    assert firmador.verificar(falsificado, ahora=AHORA) is None
+    ultimo = "A" if token[-1] != "A" else "B"
+    assert firmador.verificar(token[:-1] + ultimo, ahora=AHORA) is None
+
+
+@pytest.mark.parametrize("token", ["", "sin-punto", "a.b.c", "ñ.ñ", "@@@.###"])
+def test_token_mal_formado(token):
+    assert FirmadorTokens(SECRETO).verificar(token, ahora=AHORA) is None
+
+
+# -------------------------------
+#  MIDDLEWARE
+# -------------------------------
+def pedir(middleware, ruta, cabeceras=(), cliente="10.0.0.1", metodo="GET"):
+    """Hace una request ASGI y retorna el status (200 si llegó a la app)."""
+    enviados = []
+
+    async def recibir():
+        return {"type": "http.request", "body": b""}
+
+    async def enviar(mensaje):
+        enviados.append(mensaje)
+
+    scope = {
+        "type": "http", "method": metodo, "path": ruta, "client": (cliente, 5000),
+        "headers": [(nombre.lower().encode(), valor.encode()) for nombre, valor in cabeceras],
+    }
+    asyncio.run(middleware(scope, recibir, enviar))
+    return enviados[0]["status"]
+
+
+async def app_de_prueba(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def middleware(**opciones):
+    return MiddlewareAcceso(
+        app_de_prueba, FirmadorTokens(SECRETO), demora_maxima=0,
+        rutas_publicas={"/", "/login"}, rutas_sin_limite={"/ingesta/eventos"}, **opciones)
+
+
+def test_ruta_sin_limite_exige_token():
+    acceso = middleware(exigir_token=True)
+    assert pedir(acceso, "/ingesta/eventos") == 401
+    assert pedir(acceso, "/ingesta/eventos", [("Authorization", "Bearer basura")]) == 401
+    token, _ = acceso.firmador.emitir("camara")
+    assert pedir(acceso, "/ingesta/eventos", [("Authorization", f"Bearer {token}")]) == 200
+
+
+def test_ruta_sin_limite_no_gasta_fichas():
+    acceso = middleware(limitador=LimitadorTasa(1, 1))
+    assert all(pedir(acceso, "/ingesta/eventos") == 200 for _ in range(5))
+    assert pedir(acceso, "/casillas") == 200
+    assert pedir(acceso, "/casillas") == 429
+
+
+@pytest.mark.parametrize("autorizacion", ["Bearer vencido", "Basic YWRtaW46MTIzNDU2Nzg=", "x"])
+def test_rutas_publicas_ignoran_autorizacion_invalida(autorizacion):
+    acceso = middleware(exigir_token=True)
+    assert pedir(acceso, "/login", [("Authorization", autorizacion)]) == 200
+    assert pedir(acceso, "/", [("Authorization", autorizacion)]) == 200
+    assert pedir(acceso, "/casillas", [("Authorization", autorizacion)]) == 401
+
+
+def test_x_forwarded_for_inventado_no_evita_el_limite():
+    acceso = middleware(limitador=LimitadorTasa(1, 1), proxies=1)
+    # El proxy agrega la IP real a la derecha; lo de la izquierda lo manda el cliente
+    assert pedir(acceso, "/casillas", [("X-Forwarded-For", "1.1.1.1, 203.0.113.7")]) == 200
+    assert pedir(acceso, "/casillas", [("X-Forwarded-For", "2.2.2.2, 203.0.113.7")]) == 429
+    assert pedir(acceso, "/casillas", [("X-Forwarded-For", "203.0.113.8")]) == 200
+
+
+def test_x_forwarded_for_sin_proxies_se_ignora():
+    acceso = middleware(limitador=LimitadorTasa(1, 1))
+    assert pedir(acceso, "/casillas", [("X-Forwarded-For", "1.1.1.1")]) == 200
+    assert pedir(acceso, "/casillas", [("X-Forwarded-For", "2.2.2.2")]) == 429
+
+
+def test_admin_y_alta_de_garajes_siempre_piden_token():
+    acceso = middleware(prefijos_con_token=("/admin/",), rutas_con_token={("POST", "/garajes")})
+    assert pedir(acceso, "/casillas") == 200
+    assert pedir(acceso, "/admin/snapshot/restaurar", metodo="POST") == 401
+    assert pedir(acceso, "/garajes", metodo="POST") == 401
+    assert pedir(acceso, "/garajes/norte/casillas") == 200
+    token, _ = acceso.firmador.emitir("admin")
+    con_token = [("Authorization", f"Bearer {token}")]
+    assert pedir(acceso, "/admin/snapshot/restaurar", con_token, metodo="POST") == 200
+    assert pedir(acceso, "/garajes", con_token, metodo="POST") == 200
+
+
+def test_con_y_sin_token_comparten_balde():
+    acceso = middleware(limitador=LimitadorTasa(1, 2))
+    token, _ = acceso.firmador.emitir("admin")
+    assert pedir(acceso, "/casillas") == 200
+    assert pedir(acceso, "/casillas", [("Authorization", f"Bearer {token}")]) == 200
+    assert pedir(acceso, "/casillas", [("Authorization", f"Bearer {token}")]) == 429
+    assert pedir(acceso, "/casillas") == 429
@@ -0,0 +1,189 @@
+# ==========================================
+#  TESTS: SNAPSHOTS BINARIOS
+#  Ida y vuelta completa, migración v1 -> v2 e historial inconsistente
+# ==========================================
+
+import os
+import time
+
+import pytest
+
+from app import snapshot
+from app.models import Cochera
+from app.snapshot import SnapshotError
+
+
+def cochera_de_prueba():
+    """Cochera con vehículos, pagos, salidas y reservas."""
+    cochera = Cochera(capacidad_carros=6, capacidad_motos=3, tarifa_carro=300.0)
+    for i in range(5):
+        cochera.registrar_vehiculo("CARRO", f"C{i}X", f"Dueño {i}", f"DNI{i}", "999",
+                                   "Toyota", "Yaris", 1, 2025)
+    cochera.registrar_vehiculo("MOTO", "M1X", "Ana", "123", "988", "Honda", "CB", 3, 2025)
+    cochera.registrar_pago("C1X", 2, 2025)
+    cochera.eliminar_vehiculo("C3X")
+    ahora = time.time()
+    cochera.crear_reserva("CARRO", "R1", ahora + 3600, ahora + 7200)
+    cancelada = cochera.crear_reserva("MOTO", "R2", ahora + 60, ahora + 120)
+    cochera.cancelar_reserva(cancelada.id)
+    return cochera
+
+
+def estado(cochera):
+    return {
+        "casillas": cochera.obtener_casillas(),
+        "vehiculos": [veh.to_dict() for veh in cochera._obtener_todos_los_vehiculos()],  # noqa: SLF001
+        "historial": cochera.obtener_historial(),
+        "por_placa": cochera.obtener_historial_de_placa("C1X"),
+        "por_casilla": cochera.obtener_historial_de_casilla("C1"),
+        "reservas": cochera.obtener_reservas(),
+        "siguiente_reserva": cochera.siguiente_reserva,
+        "tarifas": (cochera.tarifa_carro, cochera.tarifa_moto),
+    }
+
+
+@pytest.mark.parametrize("comprimir", [True, False])
+def test_ida_y_vuelta(tmp_path, comprimir):
+    cochera = cochera_de_prueba()
+    ruta = str(tmp_path / "cochera.snapshot")
+    cochera.to_snapshot(ruta, comprimir=comprimir)
+
+    restaurada = Cochera.from_snapshot(ruta)
+    assert estado(restaurada) == estado(cochera)
+    assert list(restaurada.historial.tiempos) == list(cochera.historial.tiempos)
+    assert os.listdir(tmp_path) == ["cochera.snapshot"]  # sin temporales sueltos
+
+
+def test_evento_a_medio_registrar_no_se_guarda(tmp_path):
+    cochera = cochera_de_prueba()
+    eventos = len(cochera.historial)
+    # Un registro concurrente que escribió algunas columnas pero no su tiempo
+    historial = cochera.historial
+    historial.eventos.append(0)
+    historial.tipos.append(0)
+    historial.placas.append("A MEDIAS")
+    ruta = str(tmp_path / "cochera.snapshot")
+    cochera.to_snapshot(ruta)
+
+    restaurada = Cochera.from_snapshot(ruta)
+    assert len(restaurada.historial) == eventos
+    assert len(restaurada.historial.placas) == eventos
+    assert restaurada.obtener_historial_de_placa("A MEDIAS")[0] == 0
+
+
+def escribir_v1(cochera, ruta, monkeypatch):
+    """Escribe el snapshot como lo hacía la versión 1 (historial en textos)."""
+    columnas_v2 = snapshot._columnas_cochera
+
+    def columnas_v1(cochera):
+        secciones = columnas_v2(cochera)
+        for nombre, _ in snapshot._COLUMNAS_HISTORIAL:
+            del secciones[nombre]
+        # Se vuelve a armar la tabla de cadenas con los textos del historial
+        cadenas = snapshot._TablaCadenas()
+        offsets = memoryview(secciones["cadenas_idx"]).cast("Q")
+        texto = secciones["cadenas"].decode("utf-8")
+        for i in range(len(offsets) - 1):
+            cadenas.ids([texto[offsets[i]:offsets[i + 1]]])
+        secciones["historial"] = snapshot._a_bytes(cadenas.ids(list(cochera.historial)))
+        secciones["cadenas_idx"], secciones["cadenas"] = cadenas.serializar()
+        return secciones
+
+    with monkeypatch.context() as parche:
+        parche.setattr(snapshot, "VERSION", 1)
+        parche.setattr(snapshot, "_columnas_cochera", columnas_v1)
+        cochera.to_snapshot(ruta)
+
+
+def test_migracion_v1_a_v2(tmp_path, monkeypatch):
+    cochera = cochera_de_prueba()
+    ruta_v1 = str(tmp_path / "v1.snapshot")
+    escribir_v1(cochera, ruta_v1, monkeypatch)
+    with snapshot.Snapshot(ruta_v1) as snap:
+        assert snap.version == 1
+        assert "h_tiempo" not in snap.secciones()
+
+    # v1 no guardaba fechas: los eventos se recuperan con tiempo 0
+    desde_v1 = Cochera.from_snapshot(ruta_v1)
+    assert desde_v1.obtener_historial() == cochera.obtener_historial()
+    assert set(desde_v1.historial.tiempos) == {0.0}
+    esperado = estado(cochera)
+    obtenido = estado(desde_v1)
+    for clave in ("casillas", "vehiculos", "reservas", "siguiente_reserva", "tarifas"):
+        assert obtenido[clave] == esperado[clave]
+    assert obtenido["por_placa"][0] == esperado["por_placa"][0]
+
+    # Al volver a guardarla queda en v2 con el mismo contenido
+    ruta_v2 = str(tmp_path / "v2.snapshot")
+    desde_v1.to_snapshot(ruta_v2)
+    with snapshot.Snapshot(ruta_v2) as snap:
+        assert snap.version == snapshot.VERSION
+    assert estado(Cochera.from_snapshot(ruta_v2)) == estado(desde_v1)
+
+
+def test_columna_de_historial_incompleta(tmp_path, monkeypatch):
+    columnas = snapshot._columnas_cochera
+
+    def columnas_cortadas(cochera):
+        secciones = columnas(cochera)
+        secciones["h_evento"] = secciones["h_evento"][:-1]
+        return secciones
+
+    monkeypatch.setattr(snapshot, "_columnas_cochera", columnas_cortadas)
+    ruta = str(tmp_path / "cochera.snapshot")
+    cochera_de_prueba().to_snapshot(ruta)
+    with pytest.raises(SnapshotError, match="Historial inconsistente"):
+        Cochera.from_snapshot(ruta)
+
+
+def alterar(ruta, seccion, cambio):
+    """Aplica cambio(bytearray) a los bytes guardados de una sección."""
+    with snapshot.Snapshot(ruta) as snap:
+        offset, guardado, _ = snap._secciones[seccion]
+    with open(ruta, "r+b") as archivo:
+        archivo.seek(offset)
+        datos = bytearray(archivo.read(guardado))
+        cambio(datos)
+        archivo.seek(offset)
+        archivo.write(datos)
+
+
+@pytest.mark.parametrize("seccion", ["h_tiempo", "v_placa", "cadenas", "meta"])
+def test_seccion_comprimida_corrupta(tmp_path, seccion):
+    ruta = str(tmp_path / "cochera.snapshot")
+    cochera_de_prueba().to_snapshot(ruta)
+
+    def invertir_un_byte(datos):
+        datos[len(datos) // 2] ^= 0xFF
+
+    alterar(ruta, seccion, invertir_un_byte)
+    # Un SnapshotError (no zlib.error ni BufferError al cerrar el mmap)
+    with pytest.raises(SnapshotError):
+        Cochera.from_snapshot(ruta)
+
+
+def test_casilla_fuera_de_rango(tmp_path):
+    ruta = str(tmp_path / "cochera.snapshot")
+    cochera_de_prueba().to_snapshot(ruta, comprimir=False)
+
+    def casilla_99(datos):
+        datos[0:4] = (99).to_bytes(4, "little")
+
+    alterar(ruta, "v_numero", casilla_99)
+    with pytest.raises(SnapshotError, match="Casilla fuera de rango"):
+        Cochera.from_snapshot(ruta)
+
+
+def test_meta_incompleta(tmp_path, monkeypatch):
+    columnas = snapshot._columnas_cochera
+
+    def sin_capacidad(cochera):
+        secciones = columnas(cochera)
+        secciones["meta"] = b'{"tarifa_carro": 1}'
+        return secciones
+
+    monkeypatch.setattr(snapshot, "_columnas_cochera", sin_capacidad)
+    ruta = str(tmp_path / "cochera.snapshot")
+    cochera_de_prueba().to_snapshot(ruta)
+    with pytest.raises(SnapshotError, match="capacidad_carros"):
+        Cochera.from_snapshot(ruta)